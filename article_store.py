@@ -0,0 +1,148 @@
+"""
+Local SQLite store of every article either ingestion path has seen.
+
+Articles are keyed by URL and by feed GUID, so re-fetching a feed or a
+NewsAPI window only inserts rows that were not there before. Rows are
+indexed by source and publish time; new_articles() returns the not yet
+processed articles of the last N hours in the NewsAPI article shape that
+group_articles / score_group / generate_script already expect.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+ARTICLE_DB_PATH = os.environ.get("ARTICLE_DB_PATH", "articles.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    guid TEXT UNIQUE,
+    source TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    published_at TEXT NOT NULL,
+    first_seen_at TEXT NOT NULL,
+    processed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles(source);
+CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles(published_at);
+"""
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+def _iso(dt):
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_published(value):
+    """ISO-8601 (NewsAPI) or RFC 822 (RSS) date string → ISO UTC string, or None."""
+    if not value:
+        return None
+    try:
+        return _iso(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError:
+        pass
+    try:
+        return _iso(parsedate_to_datetime(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def from_newsapi(article):
+    return {
+        "url": article.get("url"),
+        "guid": None,
+        "source": (article.get("source") or {}).get("name") or "Unknown",
+        "title": article.get("title"),
+        "description": article.get("description"),
+        "published_at": parse_published(article.get("publishedAt"))
+    }
+
+
+def from_feed_entry(source, entry):
+    return {
+        "url": entry.get("link"),
+        "guid": entry.get("id"),
+        "source": source,
+        "title": entry.get("title"),
+        "description": entry.get("summary"),
+        "published_at": parse_published(entry.get("published") or entry.get("updated"))
+    }
+
+
+def to_article(row):
+    """Row → NewsAPI-shaped dict."""
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "description": row["description"],
+        "url": row["url"],
+        "guid": row["guid"],
+        "publishedAt": row["published_at"],
+        "source": {"name": row["source"]}
+    }
+
+
+class ArticleStore:
+    def __init__(self, path=ARTICLE_DB_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_articles(self, records):
+        """Insert unseen records (see from_newsapi / from_feed_entry); returns the new ones."""
+        now = _iso(_utc_now())
+        added = []
+        with self.conn:
+            for record in records:
+                if not record.get("url") and not record.get("guid"):
+                    continue
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO articles "
+                    "(url, guid, source, title, description, published_at, first_seen_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.get("url"), record.get("guid"), record["source"],
+                        record.get("title"), record.get("description"),
+                        record.get("published_at") or now,  # undated entries count as published when first seen
+                        now
+                    )
+                )
+                if cursor.rowcount:
+                    added.append(dict(record, id=cursor.lastrowid))
+        return added
+
+    def new_articles(self, hours=24, source=None):
+        """Unprocessed articles published in the last `hours`, newest first."""
+        cutoff = _iso(_utc_now() - timedelta(hours=hours))
+        query = "SELECT * FROM articles WHERE published_at >= ? AND processed_at IS NULL"
+        params = [cutoff]
+        if source:
+            query += " AND source = ?"
+            params.append(source)
+        query += " ORDER BY published_at DESC"
+        return [to_article(row) for row in self.conn.execute(query, params)]
+
+    def mark_processed(self, articles):
+        now = _iso(_utc_now())
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE articles SET processed_at = ? WHERE id = ?",
+                [(now, article["id"]) for article in articles if article.get("id") is not None]
+            )
@@ -0,0 +1,122 @@
+"""
+Pre-rendered intro/outro music.
+
+The intro MP3 never changes, yet every episode used to download it (per
+language in the multilingual scripts), decode it with pydub and apply the
+same gain or loudnorm pass again. prepared_intro_path() renders it once to a
+16-bit PCM WAV in the asset cache, keyed by the checksum of the source file
+plus the processing applied (gain, filter, two-pass loudness normalization).
+Later runs only check the checksum (for a URL, via a conditional GET) and
+read the WAV directly.
+"""
+import hashlib
+import os
+import subprocess
+import threading
+
+import requests
+
+from disk_cache import DiskCache, cache_key, file_checksum
+from loudness import loudnorm_filter, loudnorm_target
+
+ASSET_SAMPLE_RATE = 44100
+ASSET_CACHE = DiskCache(
+    "assets",
+    max_bytes=int(os.environ.get("ASSET_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+    suffix=".wav"
+)
+SOURCE_CACHE = DiskCache("asset_sources", max_bytes=1024 * 1024, suffix=".json")
+DOWNLOAD_CACHE = DiskCache("downloads", max_bytes=50 * 1024 * 1024, suffix=".bin")
+
+_prepared = {}
+_lock = threading.Lock()
+
+
+def _remote_source(url):
+    """
+    Returns (checksum, data). data is None when the server answered 304 for the
+    copy whose checksum we already know, so nothing was downloaded.
+    """
+    meta_key = cache_key(url)
+    meta = SOURCE_CACHE.get_json(meta_key) or {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = requests.get(url, headers=headers, timeout=60)
+    if response.status_code == 304 and meta.get("checksum"):
+        return meta["checksum"], None
+    if response.status_code != 200:
+        raise Exception(f"Failed to download {url}: {response.status_code} – {response.text}")
+
+    checksum = hashlib.sha256(response.content).hexdigest()
+    SOURCE_CACHE.put_json(meta_key, {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checksum": checksum
+    })
+    return checksum, response.content
+
+
+def _render(source, data, checksum, gain_db, audio_filter, normalize):
+    """Decode the source MP3 (path or bytes) with gain/filter applied → WAV bytes."""
+    filters = []
+    if normalize:
+        # Loudness stats are cached by checksum, so the intro is only ever measured once
+        filters.append(loudnorm_filter(data=data, path=None if data is not None else source, checksum=checksum))
+    if gain_db:
+        filters.append(f"volume={gain_db}dB")
+    if audio_filter:
+        filters.append(audio_filter)
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", "pipe:0" if data is not None else source]
+    if filters:
+        command += ["-af", ",".join(filters)]
+    command += ["-ar", str(ASSET_SAMPLE_RATE), "-c:a", "pcm_s16le", "-f", "wav", "pipe:1"]
+    result = subprocess.run(command, input=data, stdout=subprocess.PIPE, check=True)
+    return result.stdout
+
+
+def prepared_intro_path(source, gain_db=0, audio_filter=None, normalize=False):
+    """
+    Path to the cached WAV of `source` (local path or URL), two-pass loudness
+    normalized if `normalize`, with `gain_db` and an optional ffmpeg
+    `audio_filter` applied. Work is done at most once per process and, while
+    the source checksum is unchanged, once per cache.
+    """
+    memo_key = (source, gain_db, audio_filter, normalize)
+    with _lock:
+        if memo_key in _prepared and os.path.exists(_prepared[memo_key]):
+            return _prepared[memo_key]
+
+        is_remote = source.startswith(("http://", "https://"))
+        if is_remote:
+            checksum, data = _remote_source(source)
+        else:
+            checksum, data = file_checksum(source), None
+
+        key = cache_key(checksum, gain_db, audio_filter, normalize and loudnorm_target(), ASSET_SAMPLE_RATE)
+        path = ASSET_CACHE.get_path(key)
+        if path:
+            print(f"💾 Intro asset cache hit ({checksum[:12]})")
+        else:
+            if is_remote and data is None:
+                data = requests.get(source, timeout=60).content
+            path = ASSET_CACHE.put(key, _render(source, data, checksum, gain_db, audio_filter, normalize))
+            print(f"🎵 Rendered intro asset ({checksum[:12]}) into the cache")
+
+        _prepared[memo_key] = path
+        return path
+
+
+def cached_download_path(url):
+    """Local copy of a remote file (e.g. cover art), re-downloaded only when it changes."""
+    with _lock:
+        checksum, data = _remote_source(url)
+        path = DOWNLOAD_CACHE.get_path(checksum)
+        if not path:
+            if data is None:
+                data = requests.get(url, timeout=60).content
+            path = DOWNLOAD_CACHE.put(checksum, data)
+        return path
@@ -0,0 +1,131 @@
+"""
+Batched script translation.
+
+Translating per language sends the full English script once per language.
+translate_batch() asks for several languages in one chat completion with a
+JSON object response ({language code: translation}), so the script and the
+instructions are sent once per batch. Batches are sized so the expected
+output fits the model's completion limit. Languages whose batch fails
+(truncated output, invalid JSON, a missing key) are returned as missing so
+the caller can fall back to its per-language call. Batch responses go
+through the LLM response cache like the script completions.
+"""
+import json
+import os
+
+from llm_cache import get_cached_completion, store_completion
+from prompt_budget import count_tokens
+
+TRANSLATION_MODEL = "gpt-4-turbo"
+TRANSLATION_MODE = os.environ.get("TRANSLATION_MODE", "batch")  # "batch" or "single"
+MAX_COMPLETION_TOKENS = int(os.environ.get("TRANSLATION_MAX_COMPLETION_TOKENS", "4096"))
+# Expected translation length relative to the English script, in tokens (Japanese runs longest)
+OUTPUT_TOKEN_RATIO = float(os.environ.get("TRANSLATION_OUTPUT_TOKEN_RATIO", "1.6"))
+
+STYLE_GUIDE = (
+    "Imagine it's being read aloud by a charismatic podcast host who’s passionate about video games. "
+    "Use casual, expressive, and dynamic language — like something you'd hear on a popular local gaming podcast. "
+    "Preserve the spirit, rhythm, and excitement of the original English content. "
+)
+
+
+def translation_prompt(text, language):
+    """The per-language prompt, as used by the scripts' translate_text."""
+    return (
+        f"Translate the following podcast script into **natural, fluent {language}** with an **engaging, energetic, and conversational tone**. "
+        f"{STYLE_GUIDE}"
+        f"Avoid stiff or overly formal phrasing — make it sound authentic and fun for native {language} listeners.\n\n"
+        f"{text}"
+    )
+
+
+def batch_prompt(text, languages):
+    targets = ", ".join(f"{language} ({code})" for code, language in languages.items())
+    keys = ", ".join(f'"{code}"' for code in languages)
+    return (
+        f"Translate the following podcast script into each of these languages: {targets}. "
+        f"Every translation must be **natural and fluent** with an **engaging, energetic, and conversational tone**. "
+        f"{STYLE_GUIDE}"
+        f"Avoid stiff or overly formal phrasing — make each one sound authentic and fun for native listeners.\n\n"
+        f"Respond with a JSON object with exactly the keys {keys}. Each value is the complete translated "
+        f"script as a string, keeping the paragraph breaks of the original.\n\n"
+        f"{text}"
+    )
+
+
+def plan_batches(text, languages):
+    """Group languages so each batch's expected output fits MAX_COMPLETION_TOKENS."""
+    per_language = max(1, int(count_tokens(text) * OUTPUT_TOKEN_RATIO))
+    size = max(1, MAX_COMPLETION_TOKENS // per_language)
+    items = list(languages.items())
+    return [dict(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+def cached_completion(client, payload):
+    """(response dict, from_cache) for an OpenAI SDK chat payload, via the LLM cache."""
+    cached = get_cached_completion(payload)
+    if cached is not None:
+        return cached, True
+    response = client.chat.completions.create(**payload)
+    return response.model_dump(), False
+
+
+def _parse(result, languages):
+    choice = result["choices"][0]
+    if choice.get("finish_reason") == "length":
+        raise ValueError("response truncated")
+    translations = json.loads(choice["message"]["content"])
+    missing = [code for code in languages if not str(translations.get(code) or "").strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    return {code: translations[code].strip() for code in languages}
+
+
+def translate_batch(client, text, languages):
+    """
+    languages: {code: language name}. Returns ({code: translation}, report);
+    languages left out of the dict need the per-language fallback.
+    """
+    translations = {}
+    batch_prompt_tokens = single_prompt_tokens = 0
+    for batch in plan_batches(text, languages):
+        if len(batch) == 1:
+            continue  # nothing to share; the per-language call is cheaper than a JSON wrapper
+        payload = {
+            "model": TRANSLATION_MODEL,
+            "messages": [{"role": "user", "content": batch_prompt(text, batch)}],
+            "response_format": {"type": "json_object"},
+            "max_tokens": MAX_COMPLETION_TOKENS,
+        }
+        try:
+            result, from_cache = cached_completion(client, payload)
+            translated = _parse(result, batch)
+        except Exception as e:
+            print(f"⚠️ Batch translation ({', '.join(batch)}) failed, falling back per language: {e}")
+            continue
+        if not from_cache:
+            store_completion(payload, result)
+            batch_prompt_tokens += (result.get("usage") or {}).get("prompt_tokens") or count_tokens(
+                payload["messages"][0]["content"])
+            # What the per-language path would have sent for the same languages
+            single_prompt_tokens += sum(count_tokens(translation_prompt(text, language)) for language in batch.values())
+        translations.update(translated)
+        print(f"🌐 Translated {', '.join(batch)} in one call{' (cached)' if from_cache else ''}")
+
+    report = {
+        "batched": sorted(translations),
+        "fallback": [code for code in languages if code not in translations],
+        "batch_prompt_tokens": batch_prompt_tokens,
+        "single_prompt_tokens": single_prompt_tokens,
+    }
+    return translations, report
+
+
+def print_translation_report(report):
+    saved = report["single_prompt_tokens"] - report["batch_prompt_tokens"]
+    if report["batched"] and report["batch_prompt_tokens"]:
+        print(f"🧮 Translation input: {report['batch_prompt_tokens']} tokens batched vs "
+              f"{report['single_prompt_tokens']} per language ({saved} saved, "
+              f"{saved / report['single_prompt_tokens']:.0%})")
+    if report["fallback"]:
+        print(f"↩️ Per-language translation for: {', '.join(report['fallback'])}")
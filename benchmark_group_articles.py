@@ -0,0 +1,128 @@
+"""
+Benchmark: pairwise SequenceMatcher grouping vs. blocked clustering.
+
+    python benchmark_group_articles.py [sizes...] [--full]
+
+Synthetic titles are generated as stories with a few reworded variants each.
+The pairwise baseline is run in full up to PAIRWISE_FULL_LIMIT titles; above
+that its time is extrapolated from the first rows (pass --full to run it).
+A last case mixes in one story carried by COVERED_COPIES outlets, whose shared
+words are common across the whole list, and checks it still forms one group.
+"""
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+from title_clustering import cluster_articles, group_articles_pairwise
+
+DEFAULT_SIZES = [100, 1000, 10000]
+PAIRWISE_FULL_LIMIT = 1000
+SAMPLE_ROWS = 50
+THRESHOLD = 0.5
+COVERED_BASE = 1500
+COVERED_COPIES = 80
+COVERED_VERBS = "hit reach top pass cross exceed surpass near beat clear".split()
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+COMMON = (
+    "the a new its first after with for to in on of and is are game games update "
+    "release review trailer studio sales launch season patch delay reveal"
+).split()
+
+
+def make_titles(n, seed=7):
+    """Stories of 5–9 words from a Zipf-ish vocabulary, each with 1–4 reworded variants."""
+    rng = random.Random(seed)
+    vocab = sorted({
+        "".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10)))
+        for _ in range(max(2000, n))
+    })
+    weights = [1 / (rank + 1) ** 0.5 for rank in range(len(vocab))]
+
+    def word():
+        if rng.random() < 0.15:
+            return rng.choice(COMMON)
+        return rng.choices(vocab, weights)[0]
+
+    titles = []
+    while len(titles) < n:
+        words = [word() for _ in range(rng.randint(5, 9))]
+        for _ in range(rng.randint(1, 4)):
+            variant = list(words)
+            for _ in range(rng.randint(0, 2)):
+                variant[rng.randrange(len(variant))] = word()
+            titles.append(" ".join(variant).capitalize())
+    rng.shuffle(titles)
+    return [{"title": title} for title in titles[:n]]
+
+
+def add_covered_story(articles, copies=COVERED_COPIES, seed=11):
+    """One story reworded by many outlets, e.g. a console sales milestone."""
+    rng = random.Random(seed)
+    story = [{"title": f"Nintendo Switch 2 sales {rng.choice(COVERED_VERBS)} {rng.randint(3, 30)} million units worldwide"}
+             for _ in range(copies)]
+    mixed = articles + story
+    rng.shuffle(mixed)
+    return mixed, story
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def estimate_pairwise(articles):
+    """Time SAMPLE_ROWS full rows of comparisons and scale to all n(n-1)/2 pairs."""
+    titles = [str(a["title"]).lower() for a in articles]
+    n = len(titles)
+    pairs = 0
+    start = time.perf_counter()
+    for i in range(min(SAMPLE_ROWS, n)):
+        for j in range(i + 1, n):
+            SequenceMatcher(None, titles[i], titles[j]).ratio()
+            pairs += 1
+    elapsed = time.perf_counter() - start
+    return elapsed / max(pairs, 1) * n * (n - 1) / 2
+
+
+def agreement(baseline, candidate):
+    """Share of baseline groups reproduced exactly by the candidate clustering."""
+    as_ids = lambda groups: {tuple(id(article) for article in group) for group in groups}
+    return len(as_ids(baseline) & as_ids(candidate)) / max(len(baseline), 1)
+
+
+def main():
+    full = "--full" in sys.argv
+    sizes = [int(arg) for arg in sys.argv[1:] if arg.isdigit()] or DEFAULT_SIZES
+
+    print(f"{'titles':>8} {'pairwise s':>12} {'blocked s':>10} {'speedup':>9} {'groups':>8}  same groups")
+    for n in sizes:
+        articles = make_titles(n)
+        blocked, blocked_s = timed(cluster_articles, articles, THRESHOLD)
+
+        if full or n <= PAIRWISE_FULL_LIMIT:
+            pairwise, pairwise_s = timed(group_articles_pairwise, articles, THRESHOLD)
+            label = f"{pairwise_s:12.2f}"
+            match = f"{agreement(pairwise, blocked):.1%} of {len(pairwise)}"
+        else:
+            pairwise_s = estimate_pairwise(articles)
+            label = f"~{pairwise_s:11.2f}"
+            match = "n/a (estimated)"
+
+        print(f"{n:>8} {label} {blocked_s:10.3f} {pairwise_s / blocked_s:8.1f}x {len(blocked):>8}  {match}")
+
+    articles, story = add_covered_story(make_titles(COVERED_BASE))
+    story_ids = {id(article) for article in story}
+    largest = lambda groups: max(sum(id(article) in story_ids for article in group) for group in groups)
+    blocked, blocked_s = timed(cluster_articles, articles, THRESHOLD)
+    pairwise, pairwise_s = timed(group_articles_pairwise, articles, THRESHOLD)
+    print(f"\n{COVERED_BASE} titles + {len(story)} copies of one story: "
+          f"pairwise {pairwise_s:.2f}s, blocked {blocked_s:.3f}s, "
+          f"same groups {agreement(pairwise, blocked):.1%} of {len(pairwise)}; "
+          f"largest story group {largest(pairwise)} pairwise, {largest(blocked)} blocked")
+
+
+if __name__ == "__main__":
+    main()
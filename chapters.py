@@ -0,0 +1,76 @@
+"""
+Per-story chapters.
+
+The script is one paragraph per story (plus the fixed welcome and sign-off),
+and join_audio() already knows where each paragraph starts in the voice
+track. story_chapters() shifts those offsets past the intro music (and
+scales them for any tempo change) into (start_ms, end_ms, title) chapters
+for the ID3 CHAP/CTOC frames; chapters_json() renders the same list as a
+Podcasting 2.0 chapters file for the feed's <podcast:chapters> tag.
+"""
+import io
+import json
+import re
+import wave
+
+CHAPTERS_VERSION = "1.2.0"
+CHAPTERS_MIME_TYPE = "application/json+chapters"
+MAX_TITLE_CHARS = 70
+
+SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s")
+
+
+def wav_duration_ms(source):
+    """
+    Duration of a WAV given as bytes or a file path. WAVs that ffmpeg wrote to
+    a pipe carry a placeholder length, so the data actually present wins.
+    """
+    with (io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else open(source, "rb")) as f:
+        with wave.open(f, "rb") as wav:
+            data_start = f.tell()
+            f.seek(0, io.SEEK_END)
+            available = (f.tell() - data_start) // (wav.getnchannels() * wav.getsampwidth())
+            return min(wav.getnframes(), available) * 1000 // wav.getframerate()
+
+
+def chapter_title(text, max_chars=MAX_TITLE_CHARS):
+    """First sentence of the paragraph, cut at a word boundary if it runs long."""
+    title = SENTENCE_END.split(" ".join(text.split()), maxsplit=1)[0].strip()
+    if len(title) > max_chars:
+        title = title[:max_chars].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+    return title
+
+
+def story_chapters(markers, intro_ms, voice_ms, tempo=1.0, max_ms=None):
+    """
+    markers: (start_ms, text) per paragraph from join_audio.
+    The first chapter starts at 0 so it covers the intro music and the last
+    one runs through the outro.
+    """
+    total_ms = 2 * intro_ms + int(voice_ms / tempo)
+    if max_ms:
+        total_ms = min(total_ms, max_ms)
+
+    starts = [(0 if i == 0 else intro_ms + int(start_ms / tempo), text) for i, (start_ms, text) in enumerate(markers)]
+    starts = [(start, text) for start, text in starts if start < total_ms]
+    chapters = []
+    for i, (start, text) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else total_ms
+        chapters.append((start, end, chapter_title(text) or f"Part {i + 1}"))
+    return chapters
+
+
+def chapters_json(chapters):
+    return json.dumps({
+        "version": CHAPTERS_VERSION,
+        "chapters": [
+            {"startTime": round(start_ms / 1000, 3), "endTime": round(end_ms / 1000, 3), "title": title}
+            for start_ms, end_ms, title in chapters
+        ]
+    }, ensure_ascii=False, indent=2)
+
+
+def write_chapters_json(chapters, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(chapters_json(chapters))
+    return path
@@ -0,0 +1,36 @@
+"""
+Streaming OpenAI chat completions over server-sent events.
+"""
+import json
+
+import requests
+
+CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+
+
+def stream_chat_completion(payload, headers, usage=None, finish=None, timeout=600):
+    """
+    Yields content deltas as they arrive. If a dict is passed as `usage`, it is
+    filled with the token usage reported in the final event; if one is passed
+    as `finish`, its "reason" is set to the choice's finish_reason ("stop",
+    or "length" when the completion was cut off at max tokens).
+    """
+    body = dict(payload, stream=True, stream_options={"include_usage": True})
+    with requests.post(CHAT_COMPLETIONS_URL, headers=headers, json=body, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            event = json.loads(data)
+            if usage is not None and event.get("usage"):
+                usage.update(event["usage"])
+            for choice in event.get("choices", []):
+                if finish is not None and choice.get("finish_reason"):
+                    finish["reason"] = choice["finish_reason"]
+                content = choice.get("delta", {}).get("content")
+                if content:
+                    yield content
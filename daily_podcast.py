@@ -1,22 +1,44 @@
 import os 
 import io
 import requests
-import subprocess
 from datetime import datetime, timezone, timedelta
 from difflib import SequenceMatcher
-from pydub import AudioSegment
 import yagmail
 from email.message import EmailMessage
 import smtplib
 import ssl
-from mutagen.easyid3 import EasyID3
-from mutagen.mp3 import MP3
+
+from audio_assets import prepared_intro_path
+from chapters import story_chapters, wav_duration_ms, write_chapters_json
+from chat_stream import stream_chat_completion
+from episode_metadata import EpisodeMetadata
+from feed import STORE_FILENAME, Channel, Episode, open_store, publish_episode
+from llm_cache import get_cached_completion, store_completion
+from loudness import loudnorm_filter
+from mastering import master_episode, stream_assemble
+from prompt_budget import fit_articles_to_budget, print_budget_report
+from tts_engine import join_audio, segments_to_text, split_stream, synthesize_segments, text_to_speech_chunked
+from uploader import make_session as make_upload_session, upload, upload_many
 
 # === CONFIGURATION ===
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 OPENAI_PROJECT_ID = os.environ.get("OPENAI_PROJECT_ID")
 ELEVENLABS_API_KEY = os.environ.get("ELEVENLABS_API_KEY")
 ELEVENLABS_VOICE_ID = "Av6SEi7Xo7fWEjACu6Pr"
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"  # <-- Explicitly use the new model
+ELEVENLABS_VOICE_SETTINGS = {
+    "stability": 0.65,
+    "similarity_boost": 0.9,
+    "use_speaker_boost": True  # <-- Critical for fidelity
+}
+ELEVENLABS_OUTPUT_FORMAT = "wav"
+# Everything besides the text that changes the synthesized audio (TTS cache key)
+TTS_CACHE_PARAMS = {
+    "voice_id": ELEVENLABS_VOICE_ID,
+    "model_id": ELEVENLABS_MODEL_ID,
+    "voice_settings": ELEVENLABS_VOICE_SETTINGS,
+    "output_format": ELEVENLABS_OUTPUT_FORMAT
+}
 
 SENDER_EMAIL = os.environ.get("SENDER_EMAIL")
 APP_PASSWORD = os.environ.get("APP_PASSWORD")
@@ -28,23 +50,31 @@ PYTHONANYWHERE_API_TOKEN = os.environ.get("PYTHONANYWHERE_API_TOKEN")
 PODCAST_DIR = "/opt/render/project/src/podcast/"
 BASE_URL = f"https://{PYTHONANYWHERE_USERNAME}.pythonanywhere.com/Podcast/"
 RSS_FILENAME = "rss.xml"
+INTRO_FILENAME = "breaking-news-intro-logo-314320.mp3"
+INTRO_GAIN_DB = -8
+# "filtergraph": one ffmpeg pass (intro + loudnorm'ed voice + outro → MP3);
+# "stream": each source decoded separately and streamed as PCM into one encoder
+MASTERING_MODE = os.environ.get("MASTERING_MODE", "filtergraph")
 MAX_EPISODES = 14
+FEED_CHANNEL = Channel(
+    title="Daily Video Games Digest",
+    link=BASE_URL,
+    language="en-us",
+    description="Daily video game news podcast, summarized and delivered by Dany Waksman.",
+    author="Dany Waksman",
+    summary="Your AI-generated source for daily video game news, highlights, and analysis.",
+    image=f"{BASE_URL}podcast-cover.png",
+    self_url=f"{BASE_URL}{RSS_FILENAME}",
+    ttl=1440,
+)
+
+# Stream the script completion and start TTS on each paragraph as it arrives (0 = wait for the full script)
+STREAM_SCRIPT = os.environ.get("STREAM_SCRIPT", "1") != "0"
 
 NOW_UTC = datetime.now(timezone.utc)
 TODAY = NOW_UTC.strftime('%Y-%m-%d')
 
 
-def add_id3_tags(mp3_path, date_str):
-    try:
-        audio = MP3(mp3_path, ID3=EasyID3)
-        audio["title"] = f"Gaming News Digest - {date_str}"
-        audio["artist"] = "Dany Waksman"
-        audio["album"] = "Daily Video Games Digest"
-        audio.save()
-        print(f"✅ ID3 tags added to {mp3_path}")
-    except Exception as e:
-        print(f"❌ Failed to add ID3 tags: {e}")
-
 def fetch_rss_articles_txt():
     print("📥 Fetching scored articles from PythonAnywhere...")
     headers = {
@@ -59,7 +89,10 @@ def fetch_rss_articles_txt():
         return None
     return response.text
 
-def generate_script_from_text(rss_text):
+def build_script_request(rss_text):
+    rss_text, budget_report = fit_articles_to_budget(rss_text)
+    print_budget_report(budget_report)
+
     prompt = f"""You are generating a daily podcast script based on real gaming news articles. Follow these rules carefully:
 
 1. Carefully read and understand the articles provided.
@@ -70,9 +103,10 @@ def generate_script_from_text(rss_text):
 6. Avoid robotic phrasing, formal structures, or any foreign language inserts — keep the script clean and fluent in natural American English.
 7. **Do not** use headers like "Story 1" or Markdown formatting.
 8. Aim for a **tight, energetic script** that runs around **4–5 minutes** when read aloud.
+9. Put **each story in its own single paragraph**, separated by one blank line; the intro and the outro are separate paragraphs too. Never split a story across paragraphs or merge two stories into one.
 
 Start the podcast script with this exact intro:
-"Welcome to the Daily Video Games Digest. I'm Dany Waksman, a video game enthusiast, bringing you this AI-generated podcast to stay informed with the latest in the gaming world. Let's jump right into yesterday’s biggest stories, {(datetime.now() - timedelta(days=1)).strftime('%B %d')}.”
+"Welcome to the Daily Video Games Digest. I'm Dany Waksman, a video game enthusiast, bringing you this AI-generated podcast to stay informed with the latest in the gaming world. Let's jump right into yesterday’s biggest stories, {(NOW_UTC - timedelta(days=1)).strftime('%B %d')}.”
 
 
 End the podcast script with this exact outro:
@@ -91,6 +125,19 @@ Here are the real articles:
         "messages": [{"role": "user", "content": prompt}],
         "temperature": 0.7
     }
+    return headers, data
+
+def generate_script_from_text(rss_text):
+    headers, data = build_script_request(rss_text)
+
+    cached = get_cached_completion(data)
+    if cached is not None:
+        usage = cached.get("usage", {})
+        print(f"💾 LLM cache hit – Prompt tokens: {usage.get('prompt_tokens')}, Completion tokens: {usage.get('completion_tokens')} (not billed)")
+        script_text = cached.get('choices', [{}])[0].get('message', {}).get('content', '')
+        if script_text:
+            return script_text, None
+    print("💾 LLM cache miss – requesting a new completion.")
 
     try:
         response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data)
@@ -100,7 +147,12 @@ Here are the real articles:
         usage = result.get("usage", {})
         print(f"✅ Prompt tokens: {usage.get('prompt_tokens')}, Completion tokens: {usage.get('completion_tokens')}")
 
-        script_text = result.get('choices', [{}])[0].get('message', {}).get('content', '')
+        choice = result.get('choices', [{}])[0]
+        script_text = choice.get('message', {}).get('content', '')
+        if choice.get("finish_reason") == "length":
+            print("⚠️ Script hit the completion length limit; not caching the truncated script.")
+        elif script_text:
+            store_completion(data, result)
         return script_text, None
 
     except requests.exceptions.HTTPError as http_err:
@@ -110,8 +162,49 @@ Here are the real articles:
 
     return None, "Failed to generate script"
 
+def stream_script_segments(rss_text):
+    """Yields script segments while the completion streams in (or straight from the LLM cache)."""
+    headers, data = build_script_request(rss_text)
+
+    cached = get_cached_completion(data)
+    if cached is not None:
+        usage = cached.get("usage", {})
+        print(f"💾 LLM cache hit – Prompt tokens: {usage.get('prompt_tokens')}, Completion tokens: {usage.get('completion_tokens')} (not billed)")
+        script_text = cached.get('choices', [{}])[0].get('message', {}).get('content', '')
+        if script_text:
+            yield from split_stream([script_text])
+            return
+    print("💾 LLM cache miss – streaming a new completion.")
+
+    usage = {}
+    finish = {}
+    parts = []
+
+    def deltas():
+        for delta in stream_chat_completion(data, headers, usage=usage, finish=finish):
+            parts.append(delta)
+            yield delta
+
+    yield from split_stream(deltas())
+    print(f"✅ Prompt tokens: {usage.get('prompt_tokens')}, Completion tokens: {usage.get('completion_tokens')}")
+
+    script_text = "".join(parts)
+    if finish.get("reason") == "length":
+        print("⚠️ Script hit the completion length limit; not caching the truncated script.")
+    elif script_text:
+        store_completion(data, {
+            "choices": [{"message": {"role": "assistant", "content": script_text},
+                         "finish_reason": finish.get("reason")}],
+            "usage": usage
+        })
 
-def text_to_speech(text):
+def collect_segments(segments, sink):
+    for segment in segments:
+        sink.append(segment)
+        yield segment
+
+
+def synthesize_speech(text):
     url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
     headers = {
         "xi-api-key": ELEVENLABS_API_KEY,
@@ -119,13 +212,9 @@ def text_to_speech(text):
     }
     payload = {
         "text": text,
-        "model_id": "eleven_multilingual_v2",  # <-- Explicitly use the new model
-        "voice_settings": {
-            "stability": 0.65,
-            "similarity_boost": 0.9,
-            "use_speaker_boost": True  # <-- Critical for fidelity
-        },
-        "output_format": "wav"
+        "model_id": ELEVENLABS_MODEL_ID,
+        "voice_settings": ELEVENLABS_VOICE_SETTINGS,
+        "output_format": ELEVENLABS_OUTPUT_FORMAT
     }
 
     response = requests.post(url, headers=headers, json=payload)
@@ -134,44 +223,45 @@ def text_to_speech(text):
         return None
     return response.content
 
-def save_audio_with_intro_outro(audio_data, filename_base):
-    raw_voice_path = os.path.join(PODCAST_DIR, "voice_raw.mp3")
-    normalized_voice_path = os.path.join(PODCAST_DIR, "voice_normalized.mp3")
-
-    # Save ElevenLabs raw output first
-    with open(raw_voice_path, "wb") as f:
-        f.write(audio_data)
-
-    # Normalize audio using ffmpeg and output to MP3 (instead of memory-hungry WAV)
-    subprocess.run([
-        "ffmpeg", "-y",
-        "-i", raw_voice_path,
-        "-af", "loudnorm",
-        "-codec:a", "libmp3lame",
-        "-q:a", "2",
-        normalized_voice_path
-    ], check=True)
-
-    # Load intro music and normalized voice
-    intro = AudioSegment.from_file(os.path.join(PODCAST_DIR, "breaking-news-intro-logo-314320.mp3"), format="mp3") - 8
-    voice = AudioSegment.from_file(normalized_voice_path, format="mp3")
-
-    # Combine intro + voice + outro
-    combined = intro + voice + intro
+def text_to_speech(text, markers=None):
+    # Split at paragraph/sentence boundaries, synthesize chunks in parallel with retries, stitch in order
+    # Unchanged chunks come from the TTS cache; paragraph start times go into `markers` for chapters
+    return text_to_speech_chunked(text, synthesize_speech, TTS_CACHE_PARAMS, markers=markers)
+
+def chapters_path(date_str):
+    return os.path.join(PODCAST_DIR, f"chapters_{date_str}.json")
+
+def save_audio_with_intro_outro(voice_path, filename_base, markers=None):
     final_filename = os.path.join(PODCAST_DIR, f"final_podcast_{filename_base}.mp3")
+    intro_path = prepared_intro_path(os.path.join(PODCAST_DIR, INTRO_FILENAME), gain_db=INTRO_GAIN_DB)
+
+    # One chapter per story, from the paragraph offsets join_audio recorded
+    chapters = []
+    if markers:
+        chapters = story_chapters(markers, wav_duration_ms(intro_path), wav_duration_ms(voice_path))
+        write_chapters_json(chapters, chapters_path(filename_base))
+        print(f"📑 {len(chapters)} chapters written")
 
-    # Export final MP3
-    combined.export(
-        final_filename,
-        format="mp3",
+    # The complete ID3 tag (text frames, chapters, cover art) is written by the encode itself
+    metadata = EpisodeMetadata(
         tags={
-            "title": f"Daily Video Games Digest – {filename_base}",
+            "title": f"Gaming News Digest - {filename_base}",
             "artist": "Dany Waksman",
-            "album": "Daily Video Games Digest"
-        }
+            "album": "Daily Video Games Digest",
+            "date": filename_base
+        },
+        chapters=chapters,
+        cover=f"{BASE_URL}podcast-cover.png"
     )
 
-    return final_filename
+    if MASTERING_MODE == "filtergraph":
+        # One ffmpeg process: intro + loudnorm'ed voice + outro → final MP3 in a single encode
+        encoded = master_episode(voice_path, intro_path, final_filename, metadata=metadata)
+    else:
+        # Intro, voice and outro decoded one at a time and streamed as PCM into the MP3 encoder
+        sources = [(intro_path, None), (voice_path, loudnorm_filter(path=voice_path)), (intro_path, None)]
+        encoded = stream_assemble(sources, final_filename, metadata=metadata)
+    return encoded
 
 
 
@@ -208,105 +298,68 @@ def generate_show_notes(rss_text, date_str):
         f.write(html_content)
 
 
-def update_rss():
-    rss_path = os.path.join(PODCAST_DIR, RSS_FILENAME)
-    today_date = datetime.now().strftime('%Y-%m-%d')
-    pub_date_formatted = datetime.now().strftime('%a, %d %b %Y 06:00:00 GMT')
-
-    print("📥 Fetching latest rss.xml from PythonAnywhere...")
-    headers = {
-        "Authorization": f"Token {PYTHONANYWHERE_API_TOKEN}"
-    }
-    rss_url = f"https://www.pythonanywhere.com/api/v0/user/{PYTHONANYWHERE_USERNAME}/files/path/home/{PYTHONANYWHERE_USERNAME}/Podcast/rss.xml"
-    rss_response = requests.get(rss_url, headers=headers)
+def update_rss(encoded):
+    """
+    encoded: the episode's EncodeResult (real enclosure size, duration and hash).
+    Returns the feed files (current feed, changed archive pages) to upload; the
+    store they were rendered from is uploaded ahead of them.
+    """
+    published = datetime.strptime(TODAY, "%Y-%m-%d").replace(hour=6, tzinfo=timezone.utc)
+    files_url = f"https://www.pythonanywhere.com/api/v0/user/{PYTHONANYWHERE_USERNAME}/files/path/home/{PYTHONANYWHERE_USERNAME}/Podcast/"
+
+    episode = Episode(
+        guid=TODAY,
+        title=f"{published.strftime('%B %d')} - Gaming News Digest",
+        link=f"{BASE_URL}podcast_{TODAY}.html",
+        description=f"Gaming news highlights summarized by Dany Waksman. Read the show notes: {BASE_URL}podcast_{TODAY}.html",
+        enclosure_url=f"{BASE_URL}final_podcast_{TODAY}.mp3",
+        published=published,
+        chapters_url=f"{BASE_URL}chapters_{TODAY}.json" if os.path.exists(chapters_path(TODAY)) else None,
+        enclosure_length=encoded.bytes,
+        duration=encoded.duration,
+        sha256=encoded.sha256,
+    )
 
-    if rss_response.status_code == 200:
-        with open(rss_path, "w", encoding="utf-8") as f:
-            f.write(rss_response.text)
-        print("✅ Fetched and saved existing rss.xml")
-    else:
-        print(f"⚠️ Could not fetch existing rss.xml (status {rss_response.status_code}), will create new one.")
-
-    new_item = f"""
-    <item>
-      <title>{datetime.now().strftime('%B %d')} - Gaming News Digest</title>
-      <link>{BASE_URL}podcast_{today_date}.html</link>
-      <description><![CDATA[Gaming news highlights summarized by Dany Waksman. Read the show notes: {BASE_URL}podcast_{today_date}.html]]></description>
-      <enclosure url="{BASE_URL}final_podcast_{today_date}.mp3" length="5000000" type="audio/mpeg" />
-      <guid>{today_date}</guid>
-      <pubDate>{pub_date_formatted}</pubDate>
-    </item>"""
-
-    if os.path.exists(rss_path):
-        with open(rss_path, "r", encoding="utf-8") as f:
-            rss_content = f.read()
-        if today_date in rss_content:
-            print("✅ Today's episode already in RSS.")
-            return
-        updated_rss = rss_content.replace("</channel>", f"{new_item}\n  </channel>")
-    else:
-        print("🆕 Creating new rss.xml from scratch.")
-        updated_rss = f"""<?xml version="1.0" encoding="UTF-8"?>
-<rss version="2.0"
-  xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"
-  xmlns:atom="http://www.w3.org/2005/Atom"
-  xmlns:podcast="https://podcastindex.org/namespace/1.0">
-  <channel>
-    <title>Daily Video Games Digest</title>
-    <link>{BASE_URL}</link>
-    <language>en-us</language>
-    <description>Daily video game news podcast, summarized and delivered by Dany Waksman.</description>
-    <ttl>1440</ttl>
-
-    <atom:link href="{BASE_URL}rss.xml" rel="self" type="application/rss+xml"/>
-    <itunes:author>Dany Waksman</itunes:author>
-    <itunes:summary>Your AI-generated source for daily video game news, highlights, and analysis.</itunes:summary>
-    <itunes:explicit>no</itunes:explicit>
-    <podcast:locked>yes</podcast:locked>
-
-    <itunes:image href="{BASE_URL}podcast-cover.png"/>
-    <itunes:category text="Technology"/>
-    <itunes:category text="Leisure">
-      <itunes:category text="Video Games"/>
-    </itunes:category>
-
-{new_item}
-  </channel>
-</rss>"""
-
-    with open(rss_path, "w", encoding="utf-8") as f:
-        f.write(updated_rss)
-    print("✅ RSS updated with new episode and full Apple compliance.")
+    print("📥 Fetching episode store from PythonAnywhere...")
+    with make_upload_session(PYTHONANYWHERE_API_TOKEN) as session:
+        store = open_store(session, files_url, RSS_FILENAME, os.path.join(PODCAST_DIR, STORE_FILENAME))
+    with store:
+        feed_files = publish_episode(store, FEED_CHANNEL, episode, MAX_EPISODES, PODCAST_DIR)
+        total = store.count()
+    print(f"✅ RSS updated: {min(total, MAX_EPISODES)} of {total} episodes in the feed.")
+    return feed_files
 
 def send_email_with_podcast(final_filename):
     yag = yagmail.SMTP(user=SENDER_EMAIL, password=APP_PASSWORD)
     yag.send(
         to=RECIPIENT_EMAIL,
-        subject=f"🎧 Daily Video Games Digest – {datetime.now().strftime('%B %d, %Y')}",
+        subject=f"🎧 Daily Video Games Digest – {NOW_UTC.strftime('%B %d, %Y')}",
         contents="Here’s your latest AI-generated podcast episode!",
         attachments=final_filename
     )
 
-def push_to_pythonanywhere_api():
+def push_to_pythonanywhere_api(feed_files):
     print("🚀 Uploading files to PythonAnywhere via API...")
-    headers = {
-        "Authorization": f"Token {PYTHONANYWHERE_API_TOKEN}"
-    }
     upload_url = f"https://www.pythonanywhere.com/api/v0/user/{PYTHONANYWHERE_USERNAME}/files/path/home/{PYTHONANYWHERE_USERNAME}/Podcast/"
 
-    for filename in [
+    filenames = [
         f"final_podcast_{TODAY}.mp3",
         f"podcast_{TODAY}.html",
-        "breaking-news-intro-logo-314320.mp3",
-        "rss.xml",
-    ]:
-        local_path = os.path.join(PODCAST_DIR, filename)
-        with open(local_path, "rb") as f:
-            response = requests.post(upload_url + filename, headers=headers, files={"content": f})
-            if response.status_code != 200:
-                print(f"❌ Failed to upload {filename}: {response.text}")
-            else:
-                print(f"✅ Uploaded {filename} to PythonAnywhere.")
+        INTRO_FILENAME,
+    ]
+    if os.path.exists(chapters_path(TODAY)):
+        filenames.append(os.path.basename(chapters_path(TODAY)))
+
+    with make_upload_session(PYTHONANYWHERE_API_TOKEN) as session:
+        # Store first, on its own: a feed is never published ahead of the history it was rendered from
+        stored = upload(session, upload_url + STORE_FILENAME, os.path.join(PODCAST_DIR, STORE_FILENAME))
+        if stored.error:
+            print("⚠️ Episode store upload failed; skipping the feed upload (re-run this day to publish the episode)")
+        else:
+            filenames += feed_files
+        return [stored] + upload_many(session, upload_url, {
+            filename: os.path.join(PODCAST_DIR, filename) for filename in filenames
+        })
 
 # === MAIN PROCESS ===
 rss_text = fetch_rss_articles_txt()
@@ -314,8 +367,23 @@ if not rss_text:
     print("❌ No RSS article text found.")
     exit()
 
-print("🧠 Generating podcast script...")
-script, _ = generate_script_from_text(rss_text)
+if STREAM_SCRIPT:
+    # Each finished paragraph goes to TTS while the rest of the script is still being generated
+    print("🧠 Streaming podcast script into TTS...")
+    script_segments = []
+    try:
+        audio_chunks = synthesize_segments(
+            collect_segments(stream_script_segments(rss_text), script_segments),
+            synthesize_speech,
+            TTS_CACHE_PARAMS
+        )
+    except Exception as e:
+        print(f"❌ Streaming script generation failed: {e}")
+        exit()
+    script = segments_to_text(script_segments)
+else:
+    print("🧠 Generating podcast script...")
+    script, _ = generate_script_from_text(rss_text)
 if not script:
     print("❌ Failed to generate script.")
     exit()
@@ -335,27 +403,33 @@ except Exception as e:
 
 
 
-print("🎙️ Converting script to audio...")
-audio_data = text_to_speech(script)
-if not audio_data:
+story_markers = []  # (start_ms, paragraph text) per paragraph, for chapters
+if STREAM_SCRIPT:
+    voice_path = join_audio(audio_chunks, script_segments, story_markers) if audio_chunks else None
+else:
+    print("🎙️ Converting script to audio...")
+    voice_path = text_to_speech(script, story_markers)
+if not voice_path:
     print("❌ No audio data returned from TTS engine.")
     exit()
 print("✅ Audio data received!")
 
 os.makedirs(PODCAST_DIR, exist_ok=True)
-final_filename = save_audio_with_intro_outro(audio_data, TODAY)
-add_id3_tags(final_filename, TODAY)
+try:
+    encoded = save_audio_with_intro_outro(voice_path, TODAY, story_markers)
+finally:
+    os.remove(voice_path)  # the joined voice WAV is only an intermediate
 
 generate_show_notes(rss_text, TODAY)
 
 print("📬 Sending podcast email...")
-send_email_with_podcast(final_filename)
+send_email_with_podcast(encoded.path)
 
 print("🛠️ Updating RSS feed...")
-update_rss()
+feed_files = update_rss(encoded)
 
 print("🚀 Pushing podcast folder to PythonAnywhere...")
-push_to_pythonanywhere_api()
+push_to_pythonanywhere_api(feed_files)
 
 
 print("✅ Done!")
@@ -2,6 +2,13 @@ import feedparser
 import datetime
 import os
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from article_store import ArticleStore, from_feed_entry
+from disk_cache import DiskCache, cache_key
 
 # === SSH Key Restoration (safe for Render) ===
 SSH_PRIVATE_KEY = os.environ.get("SSH_PRIVATE_KEY", "")
@@ -21,29 +28,122 @@ FEEDS = {
 
 # === Output Filename ===
 OUTPUT_FILE = "rss_articles.txt"
+# OUTPUT_FILE lists the newest articles per source from this window of the store. Nothing on
+# this path marks them processed (the daily build reads its own scored list), so this is
+# a rolling 24h listing, not an incremental one.
+LISTING_WINDOW_HOURS = 24
 
 # Optional: spoof user-agent to avoid 403s
 HEADERS = {"User-Agent": "Mozilla/5.0 (RSS Fetcher)"}
 
+# === Concurrent Fetch Settings ===
+FEED_TIMEOUT = float(os.environ.get("FEED_TIMEOUT", "15"))  # seconds, wall clock per feed
+MAX_FEED_WORKERS = int(os.environ.get("MAX_FEED_WORKERS", "8"))
+
+# === Conditional GET Cache (ETag / Last-Modified validators + parsed entries) ===
+FEED_CACHE = DiskCache(
+    "feeds",
+    max_bytes=int(os.environ.get("FEED_CACHE_MAX_BYTES", str(20 * 1024 * 1024))),
+    max_age=int(os.environ.get("FEED_CACHE_MAX_AGE", str(7 * 24 * 3600))),
+    suffix=".json"
+)
+CACHED_ENTRY_FIELDS = ("title", "link", "id", "published", "updated", "summary")
+
+def _cache_feed(url, response, feed):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return
+    entries = [
+        {field: entry[field] for field in CACHED_ENTRY_FIELDS if field in entry}
+        for entry in feed.entries
+    ]
+    FEED_CACHE.put_json(cache_key(url), {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "entries": entries
+    })
+
+def fetch_feed(source, url):
+    """
+    Download and parse a single feed within FEED_TIMEOUT seconds, reusing the
+    cached entries when the server answers 304 Not Modified.
+    Returns (source, feed, latency_seconds, error); never raises.
+    """
+    start = time.perf_counter()
+    try:
+        headers = dict(HEADERS)
+        cached = FEED_CACHE.get_json(cache_key(url))
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        with requests.get(url, headers=headers, timeout=FEED_TIMEOUT, stream=True) as response:
+            if response.status_code == 304 and cached:
+                feed = feedparser.FeedParserDict(
+                    status=304,
+                    entries=[feedparser.FeedParserDict(entry) for entry in cached["entries"]]
+                )
+                return source, feed, time.perf_counter() - start, None
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                body += chunk
+                if time.perf_counter() - start > FEED_TIMEOUT:
+                    raise TimeoutError(f"timed out after {FEED_TIMEOUT:.0f}s")
+        feed = feedparser.parse(bytes(body))
+        if feed.entries:
+            _cache_feed(url, response, feed)
+        return source, feed, time.perf_counter() - start, None
+    except Exception as e:
+        return source, None, time.perf_counter() - start, e
+
+def fetch_all_feeds():
+    """Fetch every feed concurrently; results come back in FEEDS order."""
+    workers = max(1, min(MAX_FEED_WORKERS, len(FEEDS)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch_feed, source, url) for source, url in FEEDS.items()]
+        return [future.result() for future in futures]
+
 def fetch_articles():
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     lines = [f"RSS Fetch Run: {now}\n"]
 
-    for source, url in FEEDS.items():
-        try:
-            feed = feedparser.parse(url, request_headers=HEADERS)
-            if not feed.entries:
-                lines.append(f"[{source}] - FAILED (No articles)\n")
-                continue
+    run_start = time.perf_counter()
+    results = fetch_all_feeds()
+    run_elapsed = time.perf_counter() - run_start
 
-            lines.append(f"\n[{source}] - {len(feed.entries)} articles:\n")
-            for entry in feed.entries[:5]:  # limit to 5 per source
-                title = entry.get("title", "No Title")
-                link = entry.get("link", "No Link")
+    # The listing is the store's window, not just this run's inserts: a 304 or a quiet
+    # feed adds nothing, but its recent articles are still listed
+    with ArticleStore() as store:
+        for source, feed, latency, error in results:
+            if error is not None:
+                lines.append(f"[{source}] - FAILED ({str(error)}) ({latency:.2f}s)\n")
+            elif feed.entries:
+                added = store.add_articles(from_feed_entry(source, entry) for entry in feed.entries)
+                note = ", not modified" if feed.get("status") == 304 else ""
+                lines.append(f"[{source}] - fetched {len(feed.entries)} articles, {len(added)} new ({latency:.2f}s{note})\n")
+            else:
+                lines.append(f"[{source}] - FAILED (No articles) ({latency:.2f}s)\n")
+
+        for source in FEEDS:
+            window = store.new_articles(hours=LISTING_WINDOW_HOURS, source=source)
+            if not window:
+                continue
+            lines.append(f"\n[{source}] - {len(window)} articles from the last {LISTING_WINDOW_HOURS}h:\n")
+            for article in window[:5]:  # limit to 5 per source
+                title = article.get("title") or "No Title"
+                link = article.get("url") or "No Link"
                 lines.append(f" - {title}\n   {link}\n")
 
-        except Exception as e:
-            lines.append(f"[{source}] - FAILED ({str(e)})\n")
+    # Per-source latency summary, slowest first, so a dragging feed stands out
+    lines.append(f"\nFetch timings (total {run_elapsed:.2f}s):\n")
+    for source, _, latency, error in sorted(results, key=lambda r: r[2], reverse=True):
+        status = "FAILED" if error is not None else "ok"
+        lines.append(f" - {source}: {latency:.2f}s ({status})\n")
 
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         f.writelines([line + "\n" for line in lines])
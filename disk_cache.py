@@ -0,0 +1,137 @@
+"""
+Small on-disk cache shared by the podcast scripts.
+
+Each namespace is a folder under CACHE_ROOT holding one file per entry.
+A file's mtime records when it was written (used for max_age expiry) and
+its atime records when it was last read (used for least-recently-used
+eviction once the namespace grows past max_bytes).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+CACHE_ROOT = os.environ.get(
+    "PODCAST_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def cache_key(*parts):
+    """Stable sha256 over any mix of bytes and JSON-serializable values."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, (bytes, bytearray)):
+            part = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    def __init__(self, namespace, max_bytes, max_age=None, suffix=".bin"):
+        self.directory = os.path.join(CACHE_ROOT, namespace)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.suffix = suffix
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _expired(self, stat, now):
+        return self.max_age is not None and now - stat.st_mtime > self.max_age
+
+    def get(self, key):
+        path = self.path(key)
+        now = time.time()
+        try:
+            stat = os.stat(path)
+            if self._expired(stat, now):
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, (now, stat.st_mtime))  # mark as recently used, keep write time
+            return data
+        except FileNotFoundError:
+            return None
+
+    def get_path(self, key):
+        """Path of a live entry (marked as recently used), or None; for callers that read files directly."""
+        path = self.path(key)
+        now = time.time()
+        try:
+            stat = os.stat(path)
+            if self._expired(stat, now):
+                os.remove(path)
+                return None
+            os.utime(path, (now, stat.st_mtime))
+            return path
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+        return self.path(key)
+
+    def get_json(self, key):
+        data = self.get(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))
+        except ValueError:
+            return None
+
+    def put_json(self, key, value):
+        return self.put(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def evict(self):
+        """Drop expired entries, then least-recently-used ones until under max_bytes."""
+        now = time.time()
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if self._expired(stat, now):
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
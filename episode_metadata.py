@@ -0,0 +1,113 @@
+"""
+Episode ID3 metadata, written once by the final encode.
+
+The English scripts used to pass tags to the pydub export and then reopen the
+finished MP3 with mutagen to rewrite the title (a second full read + write,
+with two different titles). Now the encoder writes the whole ID3v2.3 tag in
+one go: text frames, CHAP/CTOC chapters (from an ffmetadata input) and the
+cover as APIC. The tag is written with ID3_PADDING spare bytes, so
+update_tags() can later edit frames in place without rewriting the audio.
+"""
+import os
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+from mutagen.id3 import ID3, Frames
+
+from audio_assets import cached_download_path
+
+ID3_VERSION = "3"
+ID3_PADDING = int(os.environ.get("ID3_PADDING", "4096"))
+
+# tags: ffmpeg metadata keys (title, artist, album, date, ...)
+# chapters: (start_ms, end_ms, title) triples
+# cover: local path or URL of a PNG/JPEG
+EpisodeMetadata = namedtuple("EpisodeMetadata", ["tags", "chapters", "cover"], defaults=((), None))
+
+# ffmpeg metadata key → ID3 frame, for update_tags()
+TAG_FRAMES = {
+    "title": "TIT2",
+    "artist": "TPE1",
+    "album": "TALB",
+    "album_artist": "TPE2",
+    "date": "TDRC",
+    "genre": "TCON",
+    "comment": "COMM",
+}
+
+
+def _escape(value):
+    value = str(value)
+    for char in ("\\", "=", ";", "#", "\n"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def ffmetadata(metadata):
+    """Global tags and chapters in ffmpeg's FFMETADATA1 format."""
+    lines = [";FFMETADATA1"]
+    lines += [f"{_escape(key)}={_escape(value)}" for key, value in metadata.tags.items()]
+    for start_ms, end_ms, title in metadata.chapters:
+        lines += ["[CHAPTER]", "TIMEBASE=1/1000", f"START={int(start_ms)}", f"END={int(end_ms)}",
+                  f"title={_escape(title)}"]
+    return "\n".join(lines) + "\n"
+
+
+def _cover_path(cover):
+    if not cover:
+        return None
+    if cover.startswith(("http://", "https://")):
+        try:
+            return cached_download_path(cover)
+        except Exception as e:
+            print(f"⚠️ Cover art unavailable, tagging without it: {e}")
+            return None
+    return cover if os.path.exists(cover) else None
+
+
+@contextmanager
+def encoder_metadata_args(metadata, next_input):
+    """
+    Yields (input_args, output_args) that make an ffmpeg MP3 encode write the
+    complete tag. next_input is the index the first extra input will get.
+    """
+    if metadata is None:
+        yield [], []
+        return
+
+    with tempfile.NamedTemporaryFile("w", suffix=".ffmeta", encoding="utf-8", delete=False) as f:
+        f.write(ffmetadata(metadata))
+    try:
+        input_args = ["-f", "ffmetadata", "-i", f.name]
+        output_args = [
+            "-map_metadata", str(next_input), "-map_chapters", str(next_input),
+            "-id3v2_version", ID3_VERSION, "-metadata_header_padding", str(ID3_PADDING)
+        ]
+        cover = _cover_path(metadata.cover)
+        if cover:
+            input_args += ["-i", cover]
+            output_args += [
+                "-map", f"{next_input + 1}:v", "-c:v", "copy", "-disposition:v", "attached_pic",
+                "-metadata:s:v", "title=Album cover", "-metadata:s:v", "comment=Cover (front)"
+            ]
+        yield input_args, output_args
+    finally:
+        os.remove(f.name)
+
+
+def _keep_padding(info):
+    # Reuse the existing padding when the new tag fits; only grow (one rewrite) when it doesn't
+    return info.padding if info.padding >= 0 else ID3_PADDING
+
+
+def update_tags(mp3_path, **tags):
+    """Edit text frames in place; the audio is only rewritten if the padding runs out."""
+    id3 = ID3(mp3_path)
+    for key, value in tags.items():
+        frame_id = TAG_FRAMES[key]
+        if frame_id == "COMM":
+            id3.setall(frame_id, [Frames[frame_id](encoding=3, lang="eng", desc="", text=[str(value)])])
+        else:
+            id3.setall(frame_id, [Frames[frame_id](encoding=3, text=[str(value)])])
+    id3.save(mp3_path, v2_version=int(ID3_VERSION), padding=_keep_padding)
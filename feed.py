@@ -0,0 +1,374 @@
+"""
+Podcast RSS feeds rendered from an episode store.
+
+Episodes live in a small SQLite database (one per feed folder, uploaded next
+to the feed) instead of only inside rss.xml. Adding an episode is a single
+keyed upsert, and the feed is rendered from the newest max_episodes rows via
+the published index, so neither step grows with the feed's history. A folder
+that has no store yet is seeded once from its existing feed.
+
+Feeds are streamed out with XMLGenerator. Older episodes stay reachable
+through RFC 5005 archive pages: fixed pages of max_episodes episodes linked
+with prev-archive/next-archive, so the polled feed stays small and only new
+or changed pages are written.
+"""
+import base64
+import json
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from xml.sax.saxutils import XMLGenerator
+
+from chapters import CHAPTERS_MIME_TYPE
+
+STORE_FILENAME = "episodes.sqlite3"
+STORE_TIMEOUT = (10, 60)  # connect, read
+
+NAMESPACES = {
+    "itunes": "http://www.itunes.com/dtds/podcast-1.0.dtd",
+    "atom": "http://www.w3.org/2005/Atom",
+    "podcast": "https://podcastindex.org/namespace/1.0",
+}
+HISTORY_NAMESPACE = "http://purl.org/syndication/history/1.0"  # RFC 5005 <fh:archive/>
+
+Channel = namedtuple("Channel", ["title", "link", "language", "description", "author", "summary", "image",
+                                 "self_url", "owner_email", "ttl"], defaults=(None, None))
+# published: timezone-aware datetime; enclosure_length (bytes), duration (seconds) and sha256 (hex)
+# come from the encoder's EncodeResult. Episodes imported from an old feed keep its placeholder length.
+Episode = namedtuple("Episode", ["guid", "title", "link", "description", "enclosure_url", "published",
+                                 "chapters_url", "author", "enclosure_length", "enclosure_type", "duration",
+                                 "sha256"],
+                     defaults=(None, None, 5000000, "audio/mpeg", None, None))
+
+
+class EpisodeStore:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS episodes "
+                        "(guid TEXT PRIMARY KEY, published TEXT NOT NULL, data TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS episodes_published ON episodes (published)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        # Position (oldest first) of the oldest episode added through this store object,
+        # and positions of episodes updated in place (their neighbours do not move)
+        self.oldest_change = float("inf")
+        self.updated = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _row(self, episode):
+        data = {key: value for key, value in episode._asdict().items() if key not in ("guid", "published")}
+        return episode.guid, episode.published.astimezone(timezone.utc).isoformat(timespec="seconds"), json.dumps(data)
+
+    def _changed(self, published):
+        position = self.db.execute("SELECT COUNT(*) FROM episodes WHERE published < ?", (published,)).fetchone()[0]
+        self.oldest_change = min(self.oldest_change, position)
+
+    def add(self, episode):
+        """Insert an episode; False if its guid is already stored."""
+        row = self._row(episode)
+        with self.db:
+            cursor = self.db.execute("INSERT OR IGNORE INTO episodes (guid, published, data) VALUES (?, ?, ?)", row)
+        if cursor.rowcount != 1:
+            return False
+        self._changed(row[1])
+        return True
+
+    def put(self, episode):
+        """
+        Insert an episode, or replace the stored one with the same guid (a
+        re-generated day gets a new length, duration and hash). Returns
+        "added", "updated" or "unchanged".
+        """
+        row = self._row(episode)
+        old = self.db.execute("SELECT guid, published, data FROM episodes WHERE guid = ?", (episode.guid,)).fetchone()
+        if old == row:
+            return "unchanged"
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO episodes (guid, published, data) VALUES (?, ?, ?)", row)
+        if old and old[1] == row[1]:
+            self.updated.add(self.db.execute("SELECT COUNT(*) FROM episodes WHERE published < ?",
+                                             (row[1],)).fetchone()[0])
+            return "updated"
+        self._changed(row[1])
+        if old:
+            self._changed(old[1])  # moved in date order: every page from the earlier position shifts
+        return "updated" if old else "added"
+
+    def latest(self, limit):
+        """Newest first."""
+        rows = self.db.execute("SELECT guid, published, data FROM episodes ORDER BY published DESC LIMIT ?", (limit,))
+        return [_episode(row) for row in rows]
+
+    def page(self, number, size):
+        """Archive page number (1 = oldest episodes), newest first."""
+        rows = self.db.execute("SELECT guid, published, data FROM episodes ORDER BY published LIMIT ? OFFSET ?",
+                               (size, (number - 1) * size))
+        return [_episode(row) for row in rows][::-1]
+
+    @property
+    def rendered_pages(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'rendered_pages'").fetchone()
+        return row[0] if row else 0
+
+    @rendered_pages.setter
+    def rendered_pages(self, value):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rendered_pages', ?)", (value,))
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM episodes").fetchone()[0]
+
+    def import_rss(self, rss_text):
+        """Add the items of an existing feed; returns how many were new."""
+        try:
+            root = ET.fromstring(rss_text.encode("utf-8"))
+        except ET.ParseError as e:
+            print(f"⚠️ Could not parse the existing feed, starting the store empty: {e}")
+            return 0
+        added = 0
+        for item in root.iter("item"):
+            episode = _item_episode(item)
+            if episode is None:
+                continue
+            added += self.add(episode)
+        return added
+
+
+def _episode(row):
+    guid, published, data = row
+    fields = {key: value for key, value in json.loads(data).items() if key in Episode._fields}
+    return Episode(guid=guid, published=datetime.fromisoformat(published), **fields)
+
+
+def _item_episode(item):
+    guid = (item.findtext("guid") or "").strip()
+    try:
+        published = parsedate_to_datetime(item.findtext("pubDate") or "")
+    except (TypeError, ValueError):
+        published = None
+    if not guid or published is None:
+        print(f"⚠️ Skipping feed item without a guid or pubDate: {item.findtext('title')}")
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    enclosure = item.find("enclosure")
+    if enclosure is None:
+        enclosure = ET.Element("enclosure")
+    chapters = item.find("podcast:chapters", NAMESPACES)
+    integrity = item.find("podcast:alternateEnclosure/podcast:integrity", NAMESPACES)
+    sri = integrity.get("value", "") if integrity is not None else ""
+    return Episode(
+        guid=guid,
+        title=(item.findtext("title") or "").strip(),
+        link=(item.findtext("link") or "").strip(),
+        description=(item.findtext("description") or "").strip(),
+        enclosure_url=enclosure.get("url", ""),
+        published=published,
+        chapters_url=chapters.get("url") if chapters is not None else None,
+        author=item.findtext("itunes:author", namespaces=NAMESPACES),
+        enclosure_length=int(enclosure.get("length") or 0),
+        enclosure_type=enclosure.get("type") or "audio/mpeg",
+        duration=_parse_duration(item.findtext("itunes:duration", namespaces=NAMESPACES)),
+        sha256=base64.b64decode(sri[len("sha256-"):]).hex() if sri.startswith("sha256-") else None,
+    )
+
+
+def _parse_duration(text):
+    """itunes:duration as seconds ("1234", "20:34" or "1:20:34"); None if absent or malformed."""
+    try:
+        seconds = 0
+        for part in (text or "").strip().split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def open_store(session, files_url, rss_filename, store_path):
+    """
+    Download the folder's episode store to store_path. The first time (no
+    remote store yet), the store is seeded from the folder's existing feed.
+    """
+    response = session.get(files_url + STORE_FILENAME, timeout=STORE_TIMEOUT)
+    if response.status_code == 200:
+        with open(store_path, "wb") as f:
+            f.write(response.content)
+        return EpisodeStore(store_path)
+    if response.status_code != 404:
+        # Rendering without the history would drop every past episode from the feed
+        response.raise_for_status()
+
+    store = EpisodeStore(store_path)
+    response = session.get(files_url + rss_filename, timeout=STORE_TIMEOUT)
+    if response.status_code == 200:
+        print(f"🆕 Seeded episode store with {store.import_rss(response.text)} episodes from {rss_filename}")
+    else:
+        print(f"🆕 No existing {rss_filename} (status {response.status_code}), starting a new feed.")
+    return store
+
+
+class _FeedWriter:
+    """Indented streaming output over XMLGenerator; nothing is held beyond the open elements."""
+
+    def __init__(self, out):
+        self.xml = XMLGenerator(out, encoding="utf-8", short_empty_elements=True)
+        self.depth = 0
+
+    def _indent(self):
+        self.xml.ignorableWhitespace("\n" + "  " * self.depth)
+
+    def start(self, name, attrs=None):
+        if self.depth:  # startDocument already ended the declaration line
+            self._indent()
+        self.xml.startElement(name, attrs or {})
+        self.depth += 1
+
+    def end(self, name):
+        self.depth -= 1
+        self._indent()
+        self.xml.endElement(name)
+
+    def element(self, name, text=None, attrs=None):
+        self._indent()
+        self.xml.startElement(name, attrs or {})
+        if text is not None:
+            self.xml.characters(str(text))
+        self.xml.endElement(name)
+
+
+def write_item(writer, episode):
+    writer.start("item")
+    writer.element("title", episode.title)
+    writer.element("link", episode.link)
+    writer.element("description", episode.description)
+    writer.element("enclosure", attrs={"url": episode.enclosure_url, "length": str(episode.enclosure_length),
+                                       "type": episode.enclosure_type})
+    writer.element("guid", episode.guid)
+    writer.element("pubDate", format_datetime(episode.published.astimezone(timezone.utc), usegmt=True))
+    if episode.duration:
+        writer.element("itunes:duration", format_duration(episode.duration))
+    if episode.sha256:
+        # Podcasting 2.0 carries the content hash on an alternateEnclosure mirroring the enclosure
+        writer.start("podcast:alternateEnclosure", {"type": episode.enclosure_type,
+                                                    "length": str(episode.enclosure_length), "default": "true"})
+        writer.element("podcast:source", attrs={"uri": episode.enclosure_url})
+        writer.element("podcast:integrity", attrs={
+            "type": "sri", "value": "sha256-" + base64.b64encode(bytes.fromhex(episode.sha256)).decode("ascii")})
+        writer.end("podcast:alternateEnclosure")
+    if episode.author:
+        writer.element("itunes:author", episode.author)
+    if episode.chapters_url:
+        writer.element("podcast:chapters", attrs={"url": episode.chapters_url, "type": CHAPTERS_MIME_TYPE})
+    writer.end("item")
+
+
+def write_feed(out, channel, episodes, self_url, links=(), archive=False):
+    """
+    Stream one feed document to the binary file out. links: (rel, href)
+    pairs for the RFC 5005 navigation; archive marks an archive page.
+    """
+    writer = _FeedWriter(out)
+    writer.xml.startDocument()
+    attrs = {"version": "2.0", **{f"xmlns:{prefix}": uri for prefix, uri in NAMESPACES.items()}}
+    if archive:
+        attrs["xmlns:fh"] = HISTORY_NAMESPACE
+    writer.start("rss", attrs)
+    writer.start("channel")
+    writer.element("title", channel.title)
+    writer.element("link", channel.link)
+    writer.element("language", channel.language)
+    writer.element("description", channel.description)
+    if channel.ttl:
+        writer.element("ttl", channel.ttl)
+    writer.element("atom:link", attrs={"href": self_url, "rel": "self", "type": "application/rss+xml"})
+    for rel, href in links:
+        writer.element("atom:link", attrs={"href": href, "rel": rel, "type": "application/rss+xml"})
+    if archive:
+        writer.element("fh:archive")
+    writer.element("itunes:author", channel.author)
+    if channel.owner_email:
+        writer.start("itunes:owner")
+        writer.element("itunes:name", channel.author)
+        writer.element("itunes:email", channel.owner_email)
+        writer.end("itunes:owner")
+    writer.element("itunes:summary", channel.summary)
+    writer.element("itunes:explicit", "no")
+    writer.element("podcast:locked", "yes")
+    writer.element("itunes:image", attrs={"href": channel.image})
+    writer.element("itunes:category", attrs={"text": "Technology"})
+    writer.start("itunes:category", {"text": "Leisure"})
+    writer.element("itunes:category", attrs={"text": "Video Games"})
+    writer.end("itunes:category")
+    for episode in episodes:
+        write_item(writer, episode)
+    writer.end("channel")
+    writer.end("rss")
+    writer.xml.ignorableWhitespace("\n")
+    writer.xml.endDocument()
+
+
+def archive_filename(rss_filename, page):
+    stem, ext = os.path.splitext(rss_filename)
+    return f"{stem}_archive_{page}{ext}"
+
+
+def publish_episode(store, channel, episode, max_episodes, directory):
+    """
+    Add (or update) the episode and write the current feed (newest max_episodes) plus any
+    archive pages that are new or changed into directory. Archive pages hold
+    max_episodes episodes each, oldest page first, and never change once
+    complete; the current feed links to the newest one (prev-archive).
+    Returns the file names written.
+    """
+    status = store.put(episode)
+    if status != "added":
+        print(f"✅ Episode {episode.guid} already in the feed ({status}).")
+    feed_url = channel.self_url
+    base, rss_filename = feed_url.rsplit("/", 1)
+    pages = store.count() // max_episodes
+
+    # New pages are written along with the previous newest page, which gains a next-archive link;
+    # an episode inserted out of date order shifts every page from its own onwards
+    rendered = store.rendered_pages
+    first = max(rendered, 1) if pages > rendered else pages + 1
+    first = min(first, store.oldest_change // max_episodes + 1)
+    # An episode updated in place only changes its own page
+    updated = {position // max_episodes + 1 for position in store.updated}
+    numbers = sorted(page for page in updated if page < first) + list(range(first, pages + 1))
+    written = []
+    for page in numbers:
+        filename = archive_filename(rss_filename, page)
+        links = [("current", feed_url)]
+        if page > 1:
+            links.append(("prev-archive", f"{base}/{archive_filename(rss_filename, page - 1)}"))
+        if page < pages:
+            links.append(("next-archive", f"{base}/{archive_filename(rss_filename, page + 1)}"))
+        with open(os.path.join(directory, filename), "wb") as out:
+            write_feed(out, channel, store.page(page, max_episodes), f"{base}/{filename}", links, archive=True)
+        written.append(filename)
+    store.rendered_pages = pages
+    store.oldest_change = float("inf")
+    store.updated.clear()
+
+    links = [("prev-archive", f"{base}/{archive_filename(rss_filename, pages)}")] if pages else []
+    with open(os.path.join(directory, rss_filename), "wb") as out:
+        write_feed(out, channel, store.latest(max_episodes), feed_url, links)
+    if written:
+        print(f"🗂️ Wrote archive pages {', '.join(map(str, numbers))} of {rss_filename}")
+    return [rss_filename] + written
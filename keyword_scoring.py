@@ -0,0 +1,62 @@
+"""
+Keyword relevance scoring for articles and article groups.
+
+The keyword list is compiled once into a single lookahead alternation,
+longest keyword first, so one scan of the text reports the longest keyword
+starting at every position. Keywords contained in a match ("sold" inside
+"units sold") are credited through a precomputed containment map. A text's
+score is the summed weight of the distinct keywords it contains, which is the
+same as the old `sum(1 for kw in KEYWORDS if kw in text)` when every weight
+is 1.
+"""
+import re
+
+KEYWORDS = [
+    'layoffs', 'acquisition', 'merger', 'studio',
+    'sold', 'units sold', 'sales', 'player count',
+    'concurrent', 'review', 'metacritic', 'launch', 'released'
+]
+
+
+class KeywordScorer:
+    def __init__(self, keywords, weights=None):
+        weights = weights or {}
+        self.weights = {kw.lower(): weights.get(kw, 1) for kw in keywords}
+        for kw, weight in weights.items():
+            self.weights.setdefault(kw.lower(), weight)
+
+        ordered = sorted(self.weights, key=len, reverse=True)
+        self.pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+        self.contains = {
+            kw: frozenset(other for other in self.weights if other in kw)
+            for kw in self.weights
+        }
+
+    def matched(self, text):
+        """Distinct keywords present in already-lowercased text."""
+        found = set()
+        for match in self.pattern.finditer(text):
+            kw = match.group(1)
+            if kw not in found:
+                found |= self.contains[kw]
+        return found
+
+    def score_text(self, text):
+        return sum(self.weights[kw] for kw in self.matched(text.lower()))
+
+    def score_group(self, group):
+        text = " ".join(
+            str(a.get("title", "")) + " " + str(a.get("description", ""))
+            for a in group
+        )
+        return self.score_text(text)
+
+    def score_groups(self, groups):
+        return [self.score_group(group) for group in groups]
+
+    def rank_groups(self, groups, top_n=None):
+        """Groups by descending score (ties keep input order); each group is scored once."""
+        scores = self.score_groups(groups)
+        order = sorted(range(len(groups)), key=scores.__getitem__, reverse=True)
+        ranked = [groups[i] for i in order]
+        return ranked if top_n is None else ranked[:top_n]
@@ -0,0 +1,83 @@
+"""
+Concurrent per-language pipelines.
+
+The languages of an episode don't depend on each other, so run_pipelines()
+runs one pipeline per language at the same time. Each pipeline wraps its
+external calls in stage("openai") / stage("elevenlabs") / stage("ffmpeg") /
+stage("pythonanywhere"); every stage has its own concurrency cap, shared by
+all languages, so rate limits and the small Render instance are respected
+while the total run time approaches that of the slowest language. A
+pipeline that raises is reported in the summary without affecting the
+others.
+"""
+import os
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+STAGE_LIMITS = {
+    "openai": int(os.environ.get("OPENAI_CONCURRENCY", "3")),
+    "elevenlabs": int(os.environ.get("ELEVENLABS_CONCURRENCY", "2")),
+    "ffmpeg": int(os.environ.get("FFMPEG_CONCURRENCY", "2")),
+    "pythonanywhere": int(os.environ.get("PYTHONANYWHERE_CONCURRENCY", "2")),
+}
+
+# timings: (stage, seconds waiting for a slot, seconds running) per stage entered
+PipelineResult = namedtuple("PipelineResult", ["key", "value", "error", "elapsed", "timings"])
+
+
+def run_pipelines(pipelines, limits=None):
+    """
+    pipelines: {key: callable(stage)}. Returns a PipelineResult per key, in
+    the given order, once every pipeline has finished or failed.
+    """
+    semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in (limits or STAGE_LIMITS).items()}
+
+    def run(key, pipeline):
+        timings = []
+
+        @contextmanager
+        def stage(name):
+            requested = time.perf_counter()
+            with semaphores[name]:
+                started = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    timings.append((name, started - requested, time.perf_counter() - started))
+
+        start = time.perf_counter()
+        try:
+            value = pipeline(stage)
+        except Exception as e:
+            print(f"❌ [{key}] pipeline failed: {e}")
+            traceback.print_exc()
+            return PipelineResult(key, None, e, time.perf_counter() - start, timings)
+        return PipelineResult(key, value, None, time.perf_counter() - start, timings)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(pipelines))) as pool:
+        futures = [pool.submit(run, key, pipeline) for key, pipeline in pipelines.items()]
+        results = [future.result() for future in futures]
+    print_summary(results, time.perf_counter() - start)
+    return results
+
+
+def print_summary(results, total):
+    print(f"\n📊 {len(results)} pipelines in {total:.1f}s "
+          f"(sum of pipelines {sum(r.elapsed for r in results):.1f}s)")
+    for result in results:
+        status = "✅" if result.error is None else f"❌ {result.error}"
+        # A stage can be entered many times (e.g. once per TTS segment); report totals per stage
+        totals = {}
+        for name, wait, run in result.timings:
+            count, waited, ran = totals.get(name, (0, 0.0, 0.0))
+            totals[name] = (count + 1, waited + wait, ran + run)
+        stages = ", ".join(
+            f"{name}{f' ×{count}' if count > 1 else ''} {ran:.1f}s" + (f" (+{waited:.1f}s queued)" if waited >= 0.1 else "")
+            for name, (count, waited, ran) in totals.items()
+        )
+        print(f"  {result.key}: {result.elapsed:.1f}s {status}" + (f" — {stages}" if stages else ""))
@@ -0,0 +1,34 @@
+"""
+Content-addressed cache for OpenAI chat completion responses.
+
+Entries are keyed on a hash of the model, temperature and messages, so
+regenerating a past day with the same articles and prompt returns the stored
+response instead of paying for the call again. Set LLM_CACHE=0 to force a
+fresh completion.
+"""
+import os
+
+from disk_cache import DiskCache, cache_key
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "1") != "0"
+LLM_CACHE = DiskCache(
+    "llm",
+    max_bytes=int(os.environ.get("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024))),
+    max_age=int(os.environ.get("LLM_CACHE_TTL", str(30 * 24 * 3600))),
+    suffix=".json"
+)
+
+
+def completion_key(payload):
+    return cache_key(payload.get("model"), payload.get("temperature"), payload.get("messages"))
+
+
+def get_cached_completion(payload):
+    if not LLM_CACHE_ENABLED:
+        return None
+    return LLM_CACHE.get_json(completion_key(payload))
+
+
+def store_completion(payload, result):
+    if LLM_CACHE_ENABLED:
+        LLM_CACHE.put_json(completion_key(payload), result)
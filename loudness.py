@@ -0,0 +1,67 @@
+"""
+Two-pass EBU R128 loudness normalization.
+
+Pass one runs ffmpeg's loudnorm in analysis mode and records the input's
+integrated loudness, true peak, LRA and threshold. Those stats are cached per
+input checksum, so an input that never changes (the intro music) is measured
+once for every language and day. Pass two is the returned loudnorm filter
+with the measured values and linear=true, which applies a single gain
+instead of the slower, less accurate dynamic single-pass mode.
+"""
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+from disk_cache import DiskCache, cache_key, file_checksum
+
+# Same targets as the plain `loudnorm` filter the scripts used to run (ffmpeg defaults)
+LOUDNORM_I = float(os.environ.get("LOUDNORM_I", "-24"))
+LOUDNORM_TP = float(os.environ.get("LOUDNORM_TP", "-2"))
+LOUDNORM_LRA = float(os.environ.get("LOUDNORM_LRA", "7"))
+
+LOUDNESS_CACHE = DiskCache("loudness", max_bytes=5 * 1024 * 1024, suffix=".json")
+STATS_RE = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}", re.S)
+
+
+def loudnorm_target():
+    return f"I={LOUDNORM_I}:TP={LOUDNORM_TP}:LRA={LOUDNORM_LRA}"
+
+
+def measure_loudness(data=None, path=None, checksum=None):
+    """Pass one for audio given as bytes or a file path; cached by content checksum."""
+    if checksum is None:
+        checksum = hashlib.sha256(data).hexdigest() if data is not None else file_checksum(path)
+    key = cache_key(checksum, loudnorm_target())
+    stats = LOUDNESS_CACHE.get_json(key)
+    if stats:
+        return stats
+
+    result = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-nostats", "-y",
+            "-i", "pipe:0" if data is not None else path,
+            "-af", f"loudnorm={loudnorm_target()}:print_format=json",
+            "-f", "null", "-"
+        ],
+        input=data, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True
+    )
+    match = STATS_RE.search(result.stderr.decode("utf-8", "replace"))
+    if not match:
+        raise RuntimeError("loudnorm analysis produced no stats")
+    stats = json.loads(match.group(0))
+    LOUDNESS_CACHE.put_json(key, stats)
+    print(f"📏 Measured loudness: {stats['input_i']} LUFS, TP {stats['input_tp']} dBTP, LRA {stats['input_lra']} LU")
+    return stats
+
+
+def loudnorm_filter(data=None, path=None, checksum=None):
+    """Pass two: a linear loudnorm filter string for the given input."""
+    stats = measure_loudness(data=data, path=path, checksum=checksum)
+    return (
+        f"loudnorm={loudnorm_target()}"
+        f":measured_I={stats['input_i']}:measured_TP={stats['input_tp']}"
+        f":measured_LRA={stats['input_lra']}:measured_thresh={stats['input_thresh']}"
+        f":offset={stats['target_offset']}:linear=true"
+    )
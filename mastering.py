@@ -0,0 +1,219 @@
+"""
+Single-pass episode mastering with ffmpeg.
+
+The old path wrote the TTS audio to voice_raw.mp3, ran loudnorm into
+voice_normalized.mp3, decoded that with pydub, concatenated intro + voice +
+intro in Python and encoded the MP3 again: two lossy encodes and two full
+decodes. master_episode() does intro, voice loudnorm, outro and the final
+encode in one ffmpeg filtergraph, reading the voice from stdin, so there are
+no intermediate files and a single encode. The voice loudnorm is the linear
+second pass from loudness.py, so the measurement pass is the only other
+decode.
+
+stream_assemble() is the path for callers that join arbitrary sources in
+order: each source is decoded by its own ffmpeg into raw PCM that is copied
+block by block into one encoder, so peak memory stays flat however long the
+episode is (the pydub path held every decoded source plus a copy per `+`).
+
+Both report the encoded size and duration from the encoder's own -progress
+output as an EncodeResult, so the feed gets a real enclosure length and
+itunes:duration without probing the file afterwards.
+"""
+import os
+import resource
+import shutil
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from disk_cache import file_checksum
+from episode_metadata import encoder_metadata_args
+from loudness import loudnorm_filter
+
+MASTER_SAMPLE_RATE = 44100
+MP3_QUALITY = "2"  # libmp3lame VBR quality, same as the old loudnorm step
+PCM_CHANNELS = 2
+PCM_BLOCK_BYTES = 64 * 1024
+TARGET_FORMAT = f"aformat=sample_fmts=fltp:sample_rates={MASTER_SAMPLE_RATE}:channel_layouts=stereo"
+# key=value progress blocks on stdout; the last block is the final size and duration
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+
+# bytes/duration (seconds) as written by the encoder; sha256 of the finished file
+EncodeResult = namedtuple("EncodeResult", ["path", "bytes", "duration", "sha256"])
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+@contextmanager
+def measure(label):
+    """Prints wall time and CPU time (this process + ffmpeg children) for the block."""
+    stats = {}
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    yield stats
+    stats["wall"] = time.perf_counter() - wall_start
+    stats["cpu"] = _cpu_seconds() - cpu_start
+    print(f"⏱️ {label}: {stats['wall']:.2f}s wall, {stats['cpu']:.2f}s CPU")
+
+
+def _parse_progress(lines):
+    """Last value of each key in ffmpeg -progress output."""
+    values = {}
+    for line in lines:
+        key, _, value = line.decode("utf-8", "replace").strip().partition("=")
+        if key:
+            values[key] = value
+    return values
+
+
+def _encode_result(path, progress):
+    try:
+        size = int(progress["total_size"])
+    except (KeyError, ValueError):
+        size = os.path.getsize(path)  # older ffmpeg builds without total_size
+    try:
+        duration = int(progress["out_time_us"]) / 1_000_000
+    except (KeyError, ValueError):
+        duration = None
+    # The mp3 muxer seeks back to write the Xing header, so the hash is taken once the file is final
+    result = EncodeResult(path, size, duration, file_checksum(path))
+    length = f", {int(duration) // 60}:{int(duration) % 60:02d}" if duration is not None else ""
+    print(f"📦 Encoded {size / 1024 / 1024:.2f} MB{length}")
+    return result
+
+
+def build_filtergraph(voice_filter=None):
+    """Input 0 is the intro, input 1 the voice; the intro is played before and after the voice."""
+    voice_chain = f"{voice_filter}," if voice_filter else ""
+    return (
+        f"[0:a]{TARGET_FORMAT},asplit=2[intro][outro];"
+        f"[1:a]{voice_chain}{TARGET_FORMAT}[voice];"
+        f"[intro][voice][outro]concat=n=3:v=0:a=1[out]"
+    )
+
+
+def master_episode(voice_data, intro_path, output_path, voice_filter=None, metadata=None, max_seconds=None,
+                   normalize=True):
+    """
+    voice_data: voice audio in any format ffmpeg reads, as a file path (read by
+    ffmpeg directly, e.g. join_audio's WAV) or bytes (piped in).
+    intro_path: intro/outro music, ideally the pre-rendered asset WAV.
+    voice_filter: extra ffmpeg filters for the voice, applied after loudness normalization.
+    metadata: EpisodeMetadata written as the ID3 tag by this same encode.
+    Writes the final MP3 to output_path in one ffmpeg process; returns its EncodeResult.
+    """
+    from_bytes = isinstance(voice_data, (bytes, bytearray))
+    if normalize:
+        measured = loudnorm_filter(data=voice_data) if from_bytes else loudnorm_filter(path=voice_data)
+        voice_filter = ",".join(f for f in (measured, voice_filter) if f)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with encoder_metadata_args(metadata, next_input=2) as (metadata_inputs, metadata_outputs):
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", intro_path,
+            "-i", "pipe:0" if from_bytes else voice_data,
+            *metadata_inputs,
+            "-filter_complex", build_filtergraph(voice_filter),
+            "-map", "[out]",
+            "-codec:a", "libmp3lame", "-q:a", MP3_QUALITY,
+            *metadata_outputs,
+            *PROGRESS_ARGS
+        ]
+        if max_seconds:
+            command += ["-t", str(max_seconds)]
+        command.append(output_path)
+
+        with measure("Single-pass mastering"):
+            completed = subprocess.run(command, input=voice_data if from_bytes else None,
+                                       stdin=None if from_bytes else subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, check=True)
+    return _encode_result(output_path, _parse_progress(completed.stdout.splitlines()))
+
+
+def _feed(pipe, data):
+    try:
+        pipe.write(data)
+    except BrokenPipeError:
+        pass  # the decoder exited early; its return code is checked by the caller
+    finally:
+        pipe.close()
+
+
+def _decode_into(source, audio_filter, sink):
+    """Decode one source (path or bytes) to s16le PCM and copy it into `sink` block by block."""
+    from_bytes = isinstance(source, (bytes, bytearray))
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0" if from_bytes else source]
+    if audio_filter:
+        command += ["-af", audio_filter]
+    command += ["-f", "s16le", "-ac", str(PCM_CHANNELS), "-ar", str(MASTER_SAMPLE_RATE), "pipe:1"]
+
+    decoder = subprocess.Popen(
+        command, stdin=subprocess.PIPE if from_bytes else subprocess.DEVNULL, stdout=subprocess.PIPE
+    )
+    feeder = None
+    if from_bytes:
+        # Fed from a thread so a full stdout pipe can never block the stdin write
+        feeder = threading.Thread(target=_feed, args=(decoder.stdin, source), daemon=True)
+        feeder.start()
+    try:
+        shutil.copyfileobj(decoder.stdout, sink, PCM_BLOCK_BYTES)
+    except BaseException:
+        decoder.kill()
+        raise
+    finally:
+        decoder.stdout.close()
+        if feeder:
+            feeder.join()
+    if decoder.wait() != 0:
+        raise subprocess.CalledProcessError(decoder.returncode, command)
+
+
+def stream_assemble(sources, output_path, metadata=None, max_seconds=None, label="Streaming assembly"):
+    """
+    sources: (source, audio_filter) pairs played in order; source is a file
+    path or encoded bytes, audio_filter an ffmpeg filter string or None.
+    Encodes the concatenation to MP3 at output_path without holding any
+    decoded source in memory, tagged with the optional EpisodeMetadata.
+    Returns the EncodeResult.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with encoder_metadata_args(metadata, next_input=1) as (metadata_inputs, metadata_outputs), measure(label):
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "s16le", "-ac", str(PCM_CHANNELS), "-ar", str(MASTER_SAMPLE_RATE), "-i", "pipe:0",
+            *metadata_inputs,
+            "-map", "0:a",
+            "-codec:a", "libmp3lame", "-q:a", MP3_QUALITY,
+            *metadata_outputs,
+            *PROGRESS_ARGS
+        ]
+        if max_seconds:
+            command += ["-t", str(max_seconds)]
+        command.append(output_path)
+
+        encoder = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        progress = {}
+        # Drained from a thread so progress output can never fill the pipe and stall the encoder
+        reader = threading.Thread(target=lambda: progress.update(_parse_progress(encoder.stdout)), daemon=True)
+        reader.start()
+        try:
+            for source, audio_filter in sources:
+                _decode_into(source, audio_filter, encoder.stdin)
+        except BrokenPipeError:
+            pass  # the encoder stopped reading (e.g. max_seconds reached)
+        finally:
+            try:
+                encoder.stdin.close()
+            except BrokenPipeError:
+                pass
+            reader.join()
+            encoder.stdout.close()
+            if encoder.wait() != 0:
+                raise subprocess.CalledProcessError(encoder.returncode, command)
+    return _encode_result(output_path, progress)
@@ -0,0 +1,392 @@
+"""
+One pipeline for every translated edition of the daily episode.
+
+The French and es/pt/ja scripts (and their rerun twins) were copies of the
+same steps with different prompts, titles and feeds. Each language is now a
+LanguageConfig in LANGUAGES; a single run fetches the English script once,
+translates (batched where the languages share the default prompt), and
+publishes every requested language concurrently through run_pipelines(),
+sharing the OpenAI client, the HTTP sessions, the intro asset and the
+LLM/TTS/loudness caches.
+
+    python multilingual_pipeline.py                          # every language, today
+    python multilingual_pipeline.py --date 2025-05-21 --languages fr
+"""
+import argparse
+import os
+import tempfile
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from io import BytesIO
+
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+
+from audio_assets import prepared_intro_path
+from batch_translation import (TRANSLATION_MODE, TRANSLATION_MODEL, cached_completion, print_translation_report,
+                               translate_batch, translation_prompt)
+from chapters import story_chapters, wav_duration_ms
+from episode_metadata import EpisodeMetadata
+from feed import STORE_FILENAME, Channel, Episode, open_store, publish_episode
+from language_scheduler import STAGE_LIMITS, run_pipelines
+from llm_cache import store_completion
+from loudness import loudnorm_filter
+from mastering import stream_assemble
+from tts_engine import text_to_speech_chunked
+from uploader import UploadManifest, make_session as make_upload_session, upload
+
+# === Configuration ===
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+PYTHONANYWHERE_USERNAME = os.getenv("PYTHONANYWHERE_USERNAME")
+PYTHONANYWHERE_API_TOKEN = os.getenv("PYTHONANYWHERE_API_TOKEN")
+
+PODCAST_URL = f"https://{PYTHONANYWHERE_USERNAME}.pythonanywhere.com/Podcast/"
+FILES_API_URL = (f"https://www.pythonanywhere.com/api/v0/user/{PYTHONANYWHERE_USERNAME}"
+                 f"/files/path/home/{PYTHONANYWHERE_USERNAME}/Podcast/")
+INTRO_MUSIC_URL = f"{PODCAST_URL}breaking-news-intro-logo-314320.mp3"
+VOICE_ID = "Av6SEi7Xo7fWEjACu6Pr"
+MODEL_ID = "eleven_multilingual_v2"
+VOICE_SETTINGS = {
+    "stability": 0.65,
+    "similarity_boost": 0.9,
+    "style": 0,
+    "use_speaker_boost": True  # <-- Critical for fidelity
+}
+AUTHOR = "Dany Waksman"
+OWNER_EMAIL = "dany.waksman@gmail.com"
+MAX_EPISODES = 14
+
+# prompt: callable(text) → translation prompt; None means the shared translation_prompt()
+# fixed_intro: callable(date) → text that replaces the script's first line (the English welcome)
+# tts_model_id: None lets ElevenLabs pick its default model
+LanguageConfig = namedtuple("LanguageConfig", [
+    "code", "language", "title", "channel_description", "item_description", "summary",
+    "rss_language", "html_heading", "prompt", "fixed_intro", "voice_id", "tts_model_id", "normalize_intro"
+], defaults=(None, None, None, VOICE_ID, MODEL_ID, False))
+
+
+def french_prompt(text):
+    return (
+        "Translate the following podcast script into natural, fluent Parisian French with an engaging and enthusiastic tone. "
+        "Use casual, expressive language that sounds natural to French listeners, avoid Canadian french expressions. "
+        "Keep the energy high and the phrasing conversational. Do not over-formalize.\n\n"
+        f"{text}"
+    )
+
+
+def french_intro(date):
+    return (
+        f"Bienvenue dans la Minute Gaming ! Je suis Dany Waksman, passionné de jeux vidéo, et chaque jour, je vous emmène "
+        f" faire le tour des actus les plus marquantes de l’univers gaming. Un condensé d’infos, généré par intelligence artificielle "
+        f"pour rester à jour sans perdre une minute ! C'est parti pour le récap d'hier {(date - timedelta(days=1)).strftime('%-d %B')}.\n\n"
+    )
+
+
+LANGUAGES = {}
+
+
+def register_language(config):
+    LANGUAGES[config.code] = config
+    return config
+
+
+register_language(LanguageConfig(
+    code="es",
+    language="Spanish",
+    title="El Flash Del Gaming",
+    channel_description="Un podcast diario con las noticias más importantes del mundo de los videojuegos, en español.",
+    item_description="Un podcast diario con las noticias más importantes del mundo de los videojuegos, en español.",
+    summary="El Flash Del Gaming — noticias rápidas del mundo gamer en español, generadas por IA.",
+    rss_language="es",
+))
+register_language(LanguageConfig(
+    code="pt",
+    language="Portuguese",
+    title="Minuto Gamer",
+    channel_description="Um podcast diário com as principais notícias do mundo dos videogames, em português.",
+    item_description="Um podcast diário com as principais notícias do mundo dos videogames, em português.",
+    summary="Minuto Gamer — notícias rápidas do mundo gamer em português, geradas por IA.",
+    rss_language="pt",
+))
+register_language(LanguageConfig(
+    code="ja",
+    language="Japanese",
+    title="ゲーミング・ミニッツ",
+    channel_description="毎日のゲーム業界ニュースを日本語でお届けするAI生成ポッドキャスト。",
+    item_description="毎日のゲーム業界ニュースを日本語でお届けするAI生成ポッドキャスト。",
+    summary="ゲーミング・ミニッツ — 毎日配信、AIが読み上げる日本語のゲームニュース。",
+    rss_language="ja",
+))
+register_language(LanguageConfig(
+    code="fr",
+    language="French",
+    title="La Minute Gaming",
+    channel_description="Un podcast quotidien d'actualités gaming en français.",
+    item_description="Podcast d'actualité jeux vidéos du jour, en français, présenté par Dany Waksman. "
+                     "Lire les notes: {base_url}podcast_{date}.html",
+    summary="La Minute Gaming — l'actu de jeux vidéos en français, générée par IA.",
+    rss_language="fr-fr",
+    html_heading="Podcast Jeux Videos",
+    prompt=french_prompt,
+    fixed_intro=french_intro,
+    tts_model_id=None,
+    normalize_intro=True,
+))
+
+# Shared by every language in a run
+PipelineContext = namedtuple("PipelineContext", ["date", "date_str", "client", "pythonanywhere", "elevenlabs"])
+
+
+def make_session(pool_size, headers):
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+    return session
+
+
+def make_context(date):
+    return PipelineContext(
+        date=date,
+        date_str=date.strftime("%Y-%m-%d"),
+        client=openai.OpenAI(api_key=OPENAI_API_KEY),
+        pythonanywhere=make_upload_session(PYTHONANYWHERE_API_TOKEN, STAGE_LIMITS["pythonanywhere"]),
+        elevenlabs=make_session(STAGE_LIMITS["elevenlabs"], {"xi-api-key": ELEVENLABS_API_KEY}),
+    )
+
+
+def base_url(config):
+    return f"{PODCAST_URL}{config.code}/"
+
+
+def batchable(config):
+    return config.prompt is None and config.fixed_intro is None
+
+
+# === Download English script ===
+def fetch_english_script(context):
+    response = context.pythonanywhere.get(f"{FILES_API_URL}en/podcast_{context.date_str}.txt")
+    if response.status_code == 200:
+        return response.text
+    raise Exception(f"Failed to fetch English script: {response.text}")
+
+
+# === Translate ===
+def translate_text(context, config, text):
+    if config.fixed_intro:
+        # The English welcome is always line 1; it is replaced by the language's own intro
+        text = "\n".join(text.strip().split("\n")[1:]).strip()
+    prompt = config.prompt(text) if config.prompt else translation_prompt(text, config.language)
+
+    payload = {"model": TRANSLATION_MODEL, "messages": [{"role": "user", "content": prompt}]}
+    result, from_cache = cached_completion(context.client, payload)
+    choice = result["choices"][0]
+    translated = (choice["message"]["content"] or "").strip()
+    if not from_cache and translated and choice.get("finish_reason") != "length":
+        store_completion(payload, result)
+
+    if config.fixed_intro:
+        translated = config.fixed_intro(context.date) + translated
+    return translated
+
+
+# === ElevenLabs TTS ===
+def synthesize_speech(context, config, text):
+    payload = {"text": text, "voice_settings": VOICE_SETTINGS}
+    if config.tts_model_id:
+        payload["model_id"] = config.tts_model_id
+    response = context.elevenlabs.post(f"https://api.elevenlabs.io/v1/text-to-speech/{config.voice_id}", json=payload)
+    if response.status_code == 200:
+        return response.content
+    raise Exception(f"TTS failed: {response.text}")
+
+
+def tts_cache_params(config):
+    return {"voice_id": config.voice_id, "model_id": config.tts_model_id, "voice_settings": VOICE_SETTINGS}
+
+
+# === Combine Audio with loudnorm ===
+def combine_audio(context, config, voice_path, markers):
+    """
+    Intro + two-pass loudnorm'ed voice + outro streamed into one tagged MP3
+    encode. Returns the MP3 as an open temporary file (removed once closed)
+    and its EncodeResult.
+    """
+    # Rendered (and, for normalized intros, measured) once per source checksum, shared by every language
+    intro_path = prepared_intro_path(INTRO_MUSIC_URL, normalize=config.normalize_intro)
+    metadata = EpisodeMetadata(
+        tags={
+            "title": f"{config.title} - {context.date_str}",
+            "artist": AUTHOR,
+            "album": config.title,
+            "date": context.date_str
+        },
+        chapters=story_chapters(markers, wav_duration_ms(intro_path), wav_duration_ms(voice_path)) if markers else (),
+        cover=f"{base_url(config)}podcast-cover-{config.code}.png"
+    )
+
+    output = tempfile.NamedTemporaryFile(suffix=".mp3")
+    sources = [(intro_path, None), (voice_path, loudnorm_filter(path=voice_path)), (intro_path, None)]
+    encoded = stream_assemble(sources, output.name, metadata=metadata, label=f"[{config.code}] Streaming assembly")
+    output.seek(0)
+    return output, encoded
+
+
+# === Upload to PythonAnywhere ===
+def upload_to_pythonanywhere(context, config, filename, fileobj, manifest=None):
+    result = upload(context.pythonanywhere, f"{FILES_API_URL}{config.code}/{filename}", fileobj, filename,
+                    manifest=manifest)
+    if result.error:
+        raise Exception(f"❌ [{config.code}] {filename}: {result.error}")
+    return result
+
+
+# === Generate HTML page ===
+def generate_html(context, config):
+    return f"""<html>
+  <head><title>{context.date_str} - {config.title}</title></head>
+  <body>
+    <h1>{context.date_str} - {config.html_heading or config.title}</h1>
+    <audio controls>
+      <source src="final_podcast_{config.code}_{context.date_str}.mp3" type="audio/mpeg">
+    </audio>
+  </body>
+</html>"""
+
+
+# === Generate RSS ===
+def feed_channel(config):
+    url = base_url(config)
+    return Channel(
+        title=config.title,
+        link=url,
+        language=config.rss_language,
+        description=config.channel_description,
+        author=AUTHOR,
+        summary=config.summary,
+        image=f"{url}podcast-cover-{config.code}.png",
+        self_url=f"{url}rss_{config.code}.xml",
+        owner_email=OWNER_EMAIL,
+    )
+
+
+def update_rss(context, config, encoded, manifest=None):
+    url = base_url(config)
+    date_str = context.date_str
+    rss_filename = f"rss_{config.code}.xml"
+    episode = Episode(
+        guid=f"{url}podcast_{date_str}.html",
+        title=f"{config.title} - {date_str}",
+        link=f"{url}podcast_{date_str}.html",
+        description=config.item_description.format(base_url=url, date=date_str),
+        enclosure_url=f"{url}final_podcast_{config.code}_{date_str}.mp3",
+        published=context.date,
+        author=AUTHOR,
+        enclosure_length=encoded.bytes,
+        duration=encoded.duration,
+        sha256=encoded.sha256,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, STORE_FILENAME)
+        with open_store(context.pythonanywhere, f"{FILES_API_URL}{config.code}/", rss_filename, store_path) as store:
+            feed_files = publish_episode(store, feed_channel(config), episode, MAX_EPISODES, tmp)
+        # Store first: a feed is never published ahead of the history it was rendered from
+        for filename in [STORE_FILENAME] + feed_files:
+            with open(os.path.join(tmp, filename), "rb") as f:
+                upload_to_pythonanywhere(context, config, filename, f, manifest)
+
+
+# === Per-language pipeline ===
+def publish_language(context, config, script, stage, translated=None):
+    code = config.code
+    if translated is None:
+        print(f"🌍 [{code}] Translating to {config.language}...")
+        with stage("openai"):
+            translated = translate_text(context, config, script)
+
+    def synthesize(text):
+        # The cap applies per ElevenLabs request, across all languages and TTS workers
+        with stage("elevenlabs"):
+            return synthesize_speech(context, config, text)
+
+    print(f"🔊 [{code}] Generating voice audio...")
+    markers = []
+    voice_path = text_to_speech_chunked(translated, synthesize, tts_cache_params(config), markers=markers)
+    if not voice_path:
+        raise Exception("No audio data returned from TTS engine.")
+
+    print(f"🎵 [{code}] Combining with intro/outro...")
+    try:
+        with stage("ffmpeg"):
+            final_audio, encoded = combine_audio(context, config, voice_path, markers)
+    finally:
+        os.remove(voice_path)  # the joined voice WAV is only an intermediate
+
+    with stage("pythonanywhere"):
+        manifest = UploadManifest(context.pythonanywhere, f"{FILES_API_URL}{code}/").load()
+
+    with final_audio, stage("pythonanywhere"):
+        upload_to_pythonanywhere(context, config, f"final_podcast_{code}_{context.date_str}.mp3", final_audio, manifest)
+
+    html = generate_html(context, config)
+    with stage("pythonanywhere"):
+        upload_to_pythonanywhere(context, config, f"podcast_{context.date_str}.html", BytesIO(html.encode("utf-8")),
+                                 manifest)
+
+    print(f"📡 [{code}] Updating RSS feed...")
+    with stage("pythonanywhere"):
+        update_rss(context, config, encoded, manifest)
+        manifest.save()
+
+    print(f"✅ {config.language} version published!")
+
+
+# === Main ===
+def run(codes=None, date=None):
+    configs = [LANGUAGES[code] for code in (codes or LANGUAGES)]
+    context = make_context(date or datetime.now(timezone.utc))
+
+    print(f"📥 Fetching English script for {context.date_str}...")
+    script = fetch_english_script(context)
+
+    # Languages on the shared prompt are translated in as few calls as possible;
+    # the rest, and anything the batch misses, are translated inside their own pipeline
+    translations = {}
+    batch = {config.code: config.language for config in configs if batchable(config)}
+    if TRANSLATION_MODE == "batch" and len(batch) > 1:
+        print(f"🌐 Translating to {', '.join(batch.values())} in one batch...")
+        translations, report = translate_batch(context.client, script, batch)
+        print_translation_report(report)
+
+    # Languages run concurrently; each external service has its own concurrency cap
+    results = run_pipelines({
+        config.code: partial(publish_language, context, config, script, translated=translations.get(config.code))
+        for config in configs
+    })
+    failed = [result.key for result in results if result.error is not None]
+    if failed:
+        raise Exception(f"❌ Failed languages: {', '.join(failed)}")
+
+
+def main(argv=None, languages=None, date=None):
+    parser = argparse.ArgumentParser(description="Publish the translated editions of the daily episode.")
+    parser.add_argument("--date", default=date, help="episode date, YYYY-MM-DD (default: today, UTC)")
+    parser.add_argument("--languages", default=",".join(languages or LANGUAGES),
+                        help=f"comma-separated language codes (default: {','.join(languages or LANGUAGES)})")
+    args = parser.parse_args(argv)
+
+    episode_date = None
+    if args.date:
+        episode_date = datetime.strptime(args.date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    codes = [code.strip() for code in args.languages.split(",") if code.strip()]
+    unknown = [code for code in codes if code not in LANGUAGES]
+    if unknown:
+        parser.error(f"unknown language(s): {', '.join(unknown)} (known: {', '.join(LANGUAGES)})")
+    run(codes, episode_date)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Token-budgeted packing of the article dump that goes into the script prompt.
+
+The scored articles text is split into article blocks (separated by blank
+lines), each block is ranked by keyword relevance, and the best blocks are
+packed into ARTICLE_TOKEN_BUDGET tokens. Kept blocks stay in their original
+order. A block that alone exceeds the budget (e.g. articles separated by
+single newlines) is split into lines, and if even that keeps nothing the
+top-ranked piece is truncated, so non-empty input never packs to an empty
+prompt. Tokens are counted locally with tiktoken when it is installed, and
+estimated at ~4 characters per token otherwise.
+"""
+import math
+import os
+import re
+
+from keyword_scoring import KEYWORDS, KeywordScorer
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+ARTICLE_TOKEN_BUDGET = int(os.environ.get("ARTICLE_TOKEN_BUDGET", "12000"))
+TOKENIZER_MODEL = "gpt-4-turbo"
+SCORER = KeywordScorer(KEYWORDS)
+
+_encoding = None
+
+
+def count_tokens(text):
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def split_articles(text):
+    return [block.strip() for block in re.split(r"\n\s*\n", text) if block.strip()]
+
+
+def _truncate(text, budget):
+    """Longest prefix of text, cut at a word boundary where possible, that fits in budget tokens."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = text[:low]
+    if low < len(text) and " " in prefix:
+        prefix = prefix.rsplit(" ", 1)[0]
+    return prefix.rstrip()
+
+
+def fit_articles_to_budget(text, budget=ARTICLE_TOKEN_BUDGET):
+    """
+    Returns (packed_text, report). report holds kept/total counts, the tokens
+    used and the first line of every dropped article.
+    """
+    blocks = []
+    reshaped = False  # blocks no longer match the input's own article blocks
+    for block in split_articles(text):
+        if count_tokens(block) + 1 > budget:
+            reshaped = True
+            blocks.extend(line.strip() for line in block.splitlines() if line.strip())
+        else:
+            blocks.append(block)
+    costs = [count_tokens(block) + 1 for block in blocks]  # +1 for the blank-line separator
+    scores = [SCORER.score_text(block) for block in blocks]
+
+    kept = set()
+    used = 0
+    for i in sorted(range(len(blocks)), key=scores.__getitem__, reverse=True):
+        if used + costs[i] <= budget:
+            kept.add(i)
+            used += costs[i]
+    if blocks and not kept:
+        # Even the best piece is over budget on its own: keep as much of it as fits
+        best = max(range(len(blocks)), key=scores.__getitem__)
+        blocks[best] = _truncate(blocks[best], budget - 1)
+        reshaped = True
+        kept.add(best)
+        used = count_tokens(blocks[best]) + 1
+
+    dropped = [blocks[i].splitlines()[0][:80] for i in range(len(blocks)) if i not in kept]
+    report = {
+        "kept": len(kept),
+        "total": len(blocks),
+        "tokens": used,
+        "budget": budget,
+        "dropped": dropped
+    }
+    if len(kept) == len(blocks) and not reshaped:
+        return text, report  # nothing trimmed: keep the prompt byte-identical
+    packed = "\n\n".join(blocks[i] for i in range(len(blocks)) if i in kept)
+    return packed, report
+
+
+def print_budget_report(report):
+    print(
+        f"✂️ Prompt budget: kept {report['kept']}/{report['total']} articles "
+        f"({report['tokens']}/{report['budget']} tokens)"
+    )
+    for line in report["dropped"]:
+        print(f"   – dropped: {line}")
@@ -1,7 +1,12 @@
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from difflib import SequenceMatcher
+from requests.adapters import HTTPAdapter
+
+from article_store import ArticleStore, from_newsapi
+from keyword_scoring import KEYWORDS, KeywordScorer
+from title_clustering import cluster_articles
 
 # === CONFIGURATION ===
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
@@ -12,70 +17,80 @@ PYTHONANYWHERE_API_TOKEN = os.environ.get("PYTHONANYWHERE_API_TOKEN")
 
 OUTPUT_FILENAME = "test-text.txt"
 
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWSAPI_CONCURRENCY = int(os.environ.get("NEWSAPI_CONCURRENCY", "4"))
+NEWSAPI_PAGE_SIZE = int(os.environ.get("NEWSAPI_PAGE_SIZE", "100"))  # NewsAPI maximum
+NEWSAPI_MAX_PAGES = int(os.environ.get("NEWSAPI_MAX_PAGES", "3"))
+
 DOMAINS = [
     "ign.com", "kotaku.com", "polygon.com", "eurogamer.net",
     "gamerant.com", "gamesradar.com", "destructoid.com",
     "pcgamer.com", "vg247.com", "gamesindustry.biz"
 ]
 
-KEYWORDS = [
-    'layoffs', 'acquisition', 'merger', 'studio',
-    'sold', 'units sold', 'sales', 'player count',
-    'concurrent', 'review', 'metacritic', 'launch', 'released'
-]
+# Optional per-keyword weights; keywords not listed here count 1
+KEYWORD_WEIGHTS = {}
+
+SCORER = KeywordScorer(KEYWORDS, KEYWORD_WEIGHTS)
 
 # === FUNCTIONS ===
 
-def fetch_articles_by_domain():
-    all_articles = []
-    from_time = (datetime.utcnow() - timedelta(hours=24)).isoformat(timespec="seconds") + "Z"
-    to_time = datetime.utcnow().isoformat(timespec="seconds") + "Z"
-    for domain in DOMAINS:
-        url = (
-            f"https://newsapi.org/v2/everything?"
-            f"from={from_time}&to={to_time}&"
-            f"sortBy=publishedAt&"
-            f"language=en&"
-            f"pageSize=10&"
-            f"domains={domain}&"
-            f"apiKey={NEWSAPI_KEY}"
-        )
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_domain(session, domain, from_time, to_time):
+    articles = []
+    for page in range(1, NEWSAPI_MAX_PAGES + 1):
+        params = {
+            "from": from_time,
+            "to": to_time,
+            "sortBy": "publishedAt",
+            "language": "en",
+            "pageSize": NEWSAPI_PAGE_SIZE,
+            "page": page,
+            "domains": domain,
+            "apiKey": NEWSAPI_KEY
+        }
         try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                articles = response.json().get("articles", [])
-                all_articles.extend(articles)
-            else:
-                print(f"❌ Failed to fetch from {domain}: {response.status_code}")
+            response = session.get(NEWSAPI_URL, params=params, timeout=30)
+            if response.status_code != 200:
+                print(f"❌ Failed to fetch from {domain} (page {page}): {response.status_code}")
+                break
+            data = response.json()
         except Exception as e:
-            print(f"❌ Exception fetching {domain}: {e}")
+            print(f"❌ Exception fetching {domain} (page {page}): {e}")
+            break
+
+        batch = data.get("articles", [])
+        articles.extend(batch)
+        # Stop once a short page comes back or everything reported has been read
+        if len(batch) < NEWSAPI_PAGE_SIZE or len(articles) >= data.get("totalResults", 0):
+            break
+    return articles
+
+def fetch_articles_by_domain(concurrency=NEWSAPI_CONCURRENCY):
+    from_time = (datetime.utcnow() - timedelta(hours=24)).isoformat(timespec="seconds") + "Z"
+    to_time = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    workers = max(1, min(concurrency, len(DOMAINS)))
+
+    # One keep-alive session shared by every worker, so TLS handshakes are reused
+    with make_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch_domain, session, domain, from_time, to_time) for domain in DOMAINS]
+        all_articles = []
+        for future in futures:  # keep DOMAINS order
+            all_articles.extend(future.result())
     return all_articles
 
 def group_articles(articles, threshold=0.5):
-    groups = []
-    used = set()
-    for i, a1 in enumerate(articles):
-        if i in used:
-            continue
-        group = [a1]
-        title1 = str(a1.get("title", "")).lower()
-        for j, a2 in enumerate(articles[i+1:], start=i+1):
-            if j in used:
-                continue
-            title2 = str(a2.get("title", "")).lower()
-            if SequenceMatcher(None, title1, title2).ratio() > threshold:
-                group.append(a2)
-                used.add(j)
-        used.add(i)
-        groups.append(group)
-    return groups
+    # Same greedy grouping and SequenceMatcher threshold as before, scored only on
+    # title pairs that share an informative word (see title_clustering.py)
+    return cluster_articles(articles, threshold=threshold)
 
 def score_group(group):
-    text = " ".join(
-        (str(a.get("title", "")) + " " + str(a.get("description", ""))).lower()
-        for a in group
-    )
-    return sum(1 for kw in KEYWORDS if kw in text)
+    return SCORER.score_group(group)
 
 def generate_script(groups):
     articles_text = ""
@@ -125,27 +140,41 @@ def push_to_pythonanywhere(content):
     print(f"📡 Upload response [{response.status_code}]: {response.text}")
     if response.status_code == 200:
         print("✅ Upload successful.")
-    else:
-        print("⚠️ Upload may have issues.")
+        return True
+    print("⚠️ Upload may have issues.")
+    return False
 
 # === MAIN SCRIPT ===
 def main():
     print("📥 Fetching gaming articles from the last 24 hours...")
-    articles = fetch_articles_by_domain()
-    print(f"✅ Retrieved {len(articles)} articles.")
-
-    print("🔗 Grouping by similar titles...")
-    grouped = group_articles(articles)
-    print(f"✅ Formed {len(grouped)} topic clusters.")
-
-    print("📊 Scoring topics by keyword relevance...")
-    top_groups = sorted(grouped, key=score_group, reverse=True)[:6]
-
-    print("🧠 Generating GPT script...")
-    script = generate_script(top_groups)
-
-    print("📤 Uploading script to PythonAnywhere as 'test-text.txt'...")
-    push_to_pythonanywhere(script)
+    fetched = fetch_articles_by_domain()
+    print(f"✅ Retrieved {len(fetched)} articles.")
+
+    with ArticleStore() as store:
+        added = store.add_articles(from_newsapi(a) for a in fetched)
+        articles = store.new_articles(hours=24)
+        print(f"🗃️ {len(added)} new to the article store, {len(articles)} unprocessed from the last 24 hours.")
+        if not articles:
+            print("✅ Nothing new to process.")
+            return
+
+        print("🔗 Grouping by similar titles...")
+        grouped = group_articles(articles)
+        print(f"✅ Formed {len(grouped)} topic clusters.")
+
+        print("📊 Scoring topics by keyword relevance...")
+        top_groups = SCORER.rank_groups(grouped, top_n=6)
+
+        print("🧠 Generating GPT script...")
+        script = generate_script(top_groups)
+
+        print("📤 Uploading script to PythonAnywhere as 'test-text.txt'...")
+        if not push_to_pythonanywhere(script):
+            # Left unprocessed so the next run picks these articles up again
+            print("❌ Upload failed; articles stay unprocessed.")
+            return
+
+        store.mark_processed(articles)
 
     print("✅ Done!")
 
@@ -0,0 +1,107 @@
+"""
+Near-duplicate title clustering for the NewsAPI article list.
+
+group_articles_pairwise is the original algorithm: every title is compared
+with every later title using SequenceMatcher, which is O(n²) ratio calls.
+
+cluster_articles keeps the same greedy grouping and the same
+`ratio() > threshold` test, but only scores candidate pairs that share a word
+(an inverted index over title tokens). Each title is blocked on all of its
+rare words, and also on its rarest words however common they are: enough of
+them that any title sharing more than `threshold` of its words must contain
+one (prefix filtering). So the words every outlet's take on a heavily covered
+story shares still link those titles, while a common word ("new", "game",
+...) is only looked up by titles with few rarer ones.
+"""
+import math
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+TOKEN_RE = re.compile(r"\w+")
+MIN_TOKEN_LENGTH = 3
+MAX_TOKEN_SHARE = 0.01   # tokens in at most 1% of titles are rare enough to always block on
+MIN_TOKEN_CAP = 50       # ...as is any token shared by no more titles than this
+NO_TOKEN_BLOCK = "\0"    # titles with no usable token at all are compared with each other
+
+
+def _title(article):
+    return str(article.get("title", "")).lower()
+
+
+def group_articles_pairwise(articles, threshold=0.5):
+    groups = []
+    used = set()
+    for i, a1 in enumerate(articles):
+        if i in used:
+            continue
+        group = [a1]
+        title1 = _title(a1)
+        for j, a2 in enumerate(articles[i+1:], start=i+1):
+            if j in used:
+                continue
+            title2 = _title(a2)
+            if SequenceMatcher(None, title1, title2).ratio() > threshold:
+                group.append(a2)
+                used.add(j)
+        used.add(i)
+        groups.append(group)
+    return groups
+
+
+def build_blocks(titles, threshold=0.5):
+    """Map each title index to the tokens it is blocked on, plus the token → indices index."""
+    token_sets = [
+        {token for token in TOKEN_RE.findall(title) if len(token) >= MIN_TOKEN_LENGTH}
+        for title in titles
+    ]
+    index = defaultdict(list)
+    for i, tokens in enumerate(token_sets):
+        for token in tokens:
+            index[token].append(i)
+
+    cap = max(MIN_TOKEN_CAP, int(len(titles) * MAX_TOKEN_SHARE))
+    blocked_on = []
+    for i, tokens in enumerate(token_sets):
+        if not tokens:
+            index[NO_TOKEN_BLOCK].append(i)
+            blocked_on.append([NO_TOKEN_BLOCK])
+            continue
+        # A title sharing more than threshold of these tokens holds one of the rarest `prefix`,
+        # however common they are; rare tokens are cheap to block on and catch reworded titles
+        prefix = max(1, len(tokens) - math.ceil(threshold * len(tokens)) + 1)
+        ranked = sorted(tokens, key=lambda token: (len(index[token]), token))
+        blocked_on.append(ranked[:prefix] + [token for token in ranked[prefix:] if len(index[token]) <= cap])
+    return blocked_on, index
+
+
+def cluster_articles(articles, threshold=0.5):
+    titles = [_title(article) for article in articles]
+    blocked_on, index = build_blocks(titles, threshold)
+    matcher = SequenceMatcher(None)
+
+    groups = []
+    used = set()
+    for i, a1 in enumerate(articles):
+        if i in used:
+            continue
+        used.add(i)
+        group = [a1]
+
+        candidates = set()
+        for token in blocked_on[i]:
+            candidates.update(index[token])
+
+        matcher.set_seq1(titles[i])
+        for j in sorted(candidates):
+            if j <= i or j in used:
+                continue
+            matcher.set_seq2(titles[j])
+            # real_quick_ratio/quick_ratio are upper bounds on ratio, so this is exact
+            if (matcher.real_quick_ratio() > threshold
+                    and matcher.quick_ratio() > threshold
+                    and matcher.ratio() > threshold):
+                group.append(articles[j])
+                used.add(j)
+        groups.append(group)
+    return groups
@@ -0,0 +1,232 @@
+"""
+Segmented text-to-speech.
+
+split_stream() cuts text, whether complete or still streaming in from the
+LLM, into segments at paragraph breaks (and at sentence ends when a
+paragraph runs long). synthesize_segments() hands each segment to a bounded
+worker pool as soon as it is cut, retrying failed segments, and returns the
+audio in segment order. Segment audio is cached on disk keyed by the text and
+the voice/model/settings, so unchanged paragraphs are never synthesized
+twice; join_audio() trims each piece's edge silence and
+stitches them back into one WAV file with fixed gaps between sentences and
+paragraphs, written piece by piece so only one decoded chunk is in memory.
+"""
+import io
+import os
+import re
+import tempfile
+import time
+import wave
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from pydub import AudioSegment
+from pydub.silence import detect_leading_silence
+
+from disk_cache import DiskCache, cache_key
+
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", "3"))
+MAX_SEGMENT_CHARS = int(os.environ.get("MAX_SEGMENT_CHARS", "1500"))
+TTS_RETRIES = int(os.environ.get("TTS_RETRIES", "3"))
+TTS_RETRY_DELAY = float(os.environ.get("TTS_RETRY_DELAY", "2"))  # seconds, doubled per attempt
+PARAGRAPH_GAP_MS = int(os.environ.get("PARAGRAPH_GAP_MS", "600"))
+SENTENCE_GAP_MS = int(os.environ.get("SENTENCE_GAP_MS", "250"))
+SILENCE_THRESHOLD_DBFS = -50.0
+
+TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE", "1") != "0"
+TTS_CACHE = DiskCache(
+    "tts",
+    max_bytes=int(os.environ.get("TTS_CACHE_MAX_BYTES", str(500 * 1024 * 1024))),
+    suffix=".audio"
+)
+
+PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+# CJK full stops are not followed by a space
+SENTENCE_END_RE = re.compile(r"[.!?…][\"”’)\]]*\s+|[。！？][」』）]*\s*")
+
+# paragraph: index of the script paragraph the text belongs to
+Segment = namedtuple("Segment", ["text", "paragraph"])
+
+
+def _sentence_cut(text, max_chars):
+    """Position just after the last sentence end within max_chars (or the first one after it)."""
+    cut = None
+    for match in SENTENCE_END_RE.finditer(text):
+        if match.end() > max_chars and cut is not None:
+            break
+        cut = match.end()
+    return cut
+
+
+def _split_paragraph(text, max_chars):
+    """Cut a complete paragraph at sentence ends, the same way a streamed one is cut."""
+    while len(text) > max_chars:
+        cut = _sentence_cut(text, max_chars)
+        if not cut:
+            break
+        piece, text = text[:cut].strip(), text[cut:]
+        if piece:
+            yield piece
+    if text.strip():
+        yield text.strip()
+
+
+def split_stream(deltas, max_chars=MAX_SEGMENT_CHARS):
+    """Yields Segments as soon as each one is complete in the incoming text."""
+    buffer = ""
+    paragraph = 0
+    for delta in deltas:
+        buffer += delta
+        while True:
+            match = PARAGRAPH_BREAK_RE.search(buffer)
+            if match:
+                text, buffer = buffer[:match.start()].strip(), buffer[match.end():]
+                if text:
+                    for piece in _split_paragraph(text, max_chars):
+                        yield Segment(piece, paragraph)
+                    paragraph += 1
+                continue
+            cut = _sentence_cut(buffer, max_chars) if len(buffer) > max_chars else None
+            if cut:
+                text, buffer = buffer[:cut].strip(), buffer[cut:]
+                yield Segment(text, paragraph)
+                continue
+            break
+    for piece in _split_paragraph(buffer.strip(), max_chars):
+        yield Segment(piece, paragraph)
+
+
+def split_script(text, max_chars=MAX_SEGMENT_CHARS):
+    return list(split_stream([text], max_chars))
+
+
+def segments_to_text(segments):
+    """Rebuild the script: segments of one paragraph joined by spaces, paragraphs by blank lines."""
+    paragraphs = {}
+    for segment in segments:
+        paragraphs.setdefault(segment.paragraph, []).append(segment.text)
+    return "\n\n".join(" ".join(parts) for _, parts in sorted(paragraphs.items()))
+
+
+def _synthesize_with_retries(synthesize, segment, number, retries):
+    for attempt in range(1, retries + 1):
+        try:
+            audio = synthesize(segment.text)
+        except Exception as e:
+            print(f"⚠️ TTS segment {number} attempt {attempt} failed: {e}")
+            audio = None
+        if audio:
+            return audio
+        if attempt < retries:
+            time.sleep(TTS_RETRY_DELAY * 2 ** (attempt - 1))
+    print(f"❌ TTS segment {number} failed after {retries} attempts.")
+    return None
+
+
+def synthesize_segments(segments, synthesize, cache_params=None, max_workers=TTS_WORKERS, retries=TTS_RETRIES):
+    """
+    Calls synthesize(text) for every segment on a bounded pool, submitting each
+    one as soon as the (possibly lazy) iterable produces it. A segment whose
+    call raises or returns nothing is retried with backoff. Returns the audio
+    bytes in segment order, or None if any segment still failed.
+
+    cache_params must describe everything besides the text that changes the
+    audio (voice, model, settings, format); pass None to bypass the cache.
+    """
+    start = time.perf_counter()
+    first_audio = []
+    cache_hits = []
+
+    def run(segment, number):
+        key = None
+        if cache_params is not None and TTS_CACHE_ENABLED:
+            key = cache_key(segment.text, cache_params)
+        audio = TTS_CACHE.get(key) if key else None
+        if audio:
+            cache_hits.append(number)
+        else:
+            audio = _synthesize_with_retries(synthesize, segment, number, retries)
+            if audio and key:
+                TTS_CACHE.put(key, audio)
+        if audio and not first_audio:
+            first_audio.append(time.perf_counter() - start)
+            print(f"🔈 First audio segment ready after {first_audio[0]:.1f}s")
+        return audio
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run, segment, number) for number, segment in enumerate(segments, start=1)]
+        results = [future.result() for future in futures]
+
+    print(
+        f"🔊 Synthesized {len(results)} segments in {time.perf_counter() - start:.1f}s "
+        f"({len(cache_hits)} from cache, {len(results) - len(cache_hits)} new)"
+    )
+    if not results or any(audio is None for audio in results):
+        return None
+    return results
+
+
+def trim_silence(sound):
+    start = detect_leading_silence(sound, silence_threshold=SILENCE_THRESHOLD_DBFS)
+    end = detect_leading_silence(sound.reverse(), silence_threshold=SILENCE_THRESHOLD_DBFS)
+    return sound[start:len(sound) - end]
+
+
+def join_audio(chunks, segments=None, markers=None, output_path=None):
+    """
+    Concatenate encoded audio chunks (any format ffmpeg reads) into a WAV file
+    at output_path (a new temporary file by default) and return its path; the
+    caller removes it once mastered. With segments given, chunks that start a
+    new paragraph get PARAGRAPH_GAP_MS of silence before them and the rest
+    SENTENCE_GAP_MS. If a `markers` list is passed, (start_ms, text) is
+    appended to it for every paragraph.
+    """
+    # Each chunk's PCM goes straight to disk, so memory holds one decoded chunk
+    # rather than the whole episode (or a copy of it per AudioSegment `+=`)
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+    output = open(output_path, "wb")
+    wav = None
+    frames = 0
+    try:
+        for i, chunk in enumerate(chunks):
+            sound = trim_silence(AudioSegment.from_file(io.BytesIO(chunk)))
+            new_paragraph = i == 0 or segments is None or segments[i].paragraph != segments[i - 1].paragraph
+            if wav is None:
+                wav = wave.open(output, "wb")
+                wav.setnchannels(sound.channels)
+                wav.setsampwidth(sound.sample_width)
+                wav.setframerate(sound.frame_rate)
+            else:
+                sound = (sound.set_frame_rate(wav.getframerate())
+                         .set_channels(wav.getnchannels())
+                         .set_sample_width(wav.getsampwidth()))
+                gap = PARAGRAPH_GAP_MS if new_paragraph else SENTENCE_GAP_MS
+                gap_frames = wav.getframerate() * gap // 1000
+                wav.writeframesraw(b"\0" * (gap_frames * wav.getnchannels() * wav.getsampwidth()))
+                frames += gap_frames
+            if new_paragraph and markers is not None:
+                markers.append((frames * 1000 // wav.getframerate(), segments[i].text if segments else ""))
+            wav.writeframesraw(sound.raw_data)
+            frames += int(sound.frame_count())
+        if wav is not None:
+            wav.close()  # patches the RIFF header sizes
+    except BaseException:
+        output.close()
+        os.remove(output_path)
+        raise
+    output.close()
+    if wav is None:
+        os.remove(output_path)
+        return None
+    return output_path
+
+
+def text_to_speech_chunked(text, synthesize, cache_params=None, max_workers=TTS_WORKERS, markers=None):
+    """Whole script → WAV file path via split_script / synthesize_segments / join_audio."""
+    segments = split_script(text)
+    chunks = synthesize_segments(segments, synthesize, cache_params, max_workers=max_workers)
+    if not chunks:
+        return None
+    return join_audio(chunks, segments, markers)
@@ -0,0 +1,260 @@
+"""
+Concurrent, streaming uploads to the PythonAnywhere files API.
+
+All uploads go through one keep-alive Session whose connection pool matches
+the worker count, so files share connections instead of opening one each.
+File bodies are not read into memory: MultipartStream presents the
+multipart/form-data body (headers, file, trailer) as a file-like object of
+known length, which requests streams block by block with a Content-Length.
+Failed uploads are retried with exponential backoff, except for errors that
+cannot succeed on retry (413 too large, 401/403 auth).
+
+Each remote folder keeps a manifest (MANIFEST_NAME) of the sha256 and size of
+every file uploaded through here, mirrored in the local cache. Files whose
+hash matches the manifest (the intro MP3, re-runs of the same day) are
+skipped; the manifest itself is re-uploaded only when something changed.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from disk_cache import DiskCache, cache_key
+
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "4"))
+UPLOAD_RETRIES = int(os.environ.get("UPLOAD_RETRIES", "3"))
+UPLOAD_BACKOFF = float(os.environ.get("UPLOAD_BACKOFF", "2"))  # seconds, doubled per attempt
+UPLOAD_TIMEOUT = (10, 300)  # connect, read
+MANIFEST_NAME = ".upload_manifest.json"
+FATAL_STATUSES = {401: "authentication or permission error", 403: "authentication or permission error",
+                  413: "file too large for the API"}
+
+UploadResult = namedtuple("UploadResult", ["name", "bytes", "seconds", "attempts", "error", "skipped"],
+                          defaults=(False,))
+
+MANIFEST_MIRROR = DiskCache("upload_manifests", max_bytes=1024 * 1024, suffix=".json")
+
+
+def make_session(token, pool_size=UPLOAD_WORKERS):
+    session = requests.Session()
+    session.headers["Authorization"] = f"Token {token}"
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+    return session
+
+
+class MultipartStream(io.RawIOBase):
+    """A one-file multipart/form-data body, read lazily from the underlying file."""
+
+    def __init__(self, fileobj, filename, field="content"):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._file = fileobj
+        self._file_start = fileobj.tell()
+        self._file_size = fileobj.seek(0, os.SEEK_END) - self._file_start
+        self.rewind()
+
+    def rewind(self):
+        self._file.seek(self._file_start)
+        self._position = 0
+
+    def __len__(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        remaining = len(self) - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        parts = []
+        while size > 0:
+            position = self._position
+            if position < len(self._head):
+                chunk = self._head[position:position + size]
+            elif position < len(self._head) + self._file_size:
+                chunk = self._file.read(min(size, len(self._head) + self._file_size - position))
+                if not chunk:
+                    raise IOError("file shrank while uploading")
+            else:
+                offset = position - len(self._head) - self._file_size
+                chunk = self._tail[offset:offset + size]
+            parts.append(chunk)
+            self._position += len(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
+
+
+def _open(source):
+    """(file object, needs closing) for a local path, bytes or an open binary file."""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source), True
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb"), True
+    return source, False
+
+
+def _checksum(fileobj):
+    """sha256 of the rest of an open binary file, leaving its position unchanged."""
+    start = fileobj.tell()
+    digest = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(1024 * 1024), b""):
+        digest.update(block)
+    fileobj.seek(start)
+    return digest.hexdigest()
+
+
+class UploadManifest:
+    """{name: {"sha256", "bytes"}} for one remote folder; the remote copy wins over the local mirror."""
+
+    def __init__(self, session, base_url):
+        self.session = session
+        self.base_url = base_url
+        self.key = cache_key("upload_manifest", base_url)
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            response = self.session.get(self.base_url + MANIFEST_NAME, timeout=UPLOAD_TIMEOUT)
+            if response.status_code == 404:
+                self.entries = {}  # nothing uploaded through the manifest yet
+            else:
+                response.raise_for_status()
+                self.entries = response.json()
+                MANIFEST_MIRROR.put_json(self.key, self.entries)
+        except (requests.RequestException, ValueError) as e:
+            self.entries = MANIFEST_MIRROR.get_json(self.key) or {}
+            print(f"⚠️ Could not fetch the upload manifest ({e}); using the local copy ({len(self.entries)} files)")
+        return self
+
+    def unchanged(self, name, checksum):
+        with self._lock:
+            return (self.entries.get(name) or {}).get("sha256") == checksum
+
+    def record(self, name, checksum, size):
+        with self._lock:
+            self.entries[name] = {"sha256": checksum, "bytes": size}
+            self.changed = True
+
+    def save(self):
+        """Upload the manifest if any file changed; the local mirror is written either way."""
+        with self._lock:
+            entries = dict(self.entries)
+            changed, self.changed = self.changed, False
+        data = json.dumps(entries, ensure_ascii=False, indent=2, sort_keys=True).encode("utf-8")
+        if changed:
+            result = upload(self.session, self.base_url + MANIFEST_NAME, data, MANIFEST_NAME)
+            if result.error:
+                # Leave the mirror alone: the remote manifest is stale, so the next run re-uploads
+                return result
+        MANIFEST_MIRROR.put_json(self.key, entries)
+        return None
+
+
+def upload(session, url, source, name=None, retries=UPLOAD_RETRIES, manifest=None):
+    """
+    Upload one file (path, bytes or binary file object) to url; never raises.
+    With a manifest, a file whose hash is already recorded is skipped.
+    """
+    name = name or url.rsplit("/", 1)[-1]
+    start = time.perf_counter()
+    fileobj, owned = None, False
+    size = 0
+    checksum = None
+    error = None
+    attempt = 0
+    try:
+        fileobj, owned = _open(source)
+        body = MultipartStream(fileobj, name)
+        size = body._file_size
+        if manifest is not None:
+            checksum = _checksum(fileobj)
+            if manifest.unchanged(name, checksum):
+                print(f"⏭️ {name} unchanged, skipping upload")
+                return UploadResult(name, size, time.perf_counter() - start, 0, None, True)
+        for attempt in range(1, retries + 1):
+            body.rewind()
+            try:
+                response = session.post(url, data=body, headers={"Content-Type": body.content_type},
+                                        timeout=UPLOAD_TIMEOUT)
+            except requests.RequestException as e:
+                error = str(e)
+            else:
+                if response.status_code == 200:
+                    error = None
+                    break
+                error = f"HTTP {response.status_code}: {response.text[:200] or '[empty]'}"
+                if response.status_code in FATAL_STATUSES:
+                    error = f"{FATAL_STATUSES[response.status_code]} ({error})"
+                    break
+            if attempt < retries:
+                delay = UPLOAD_BACKOFF * 2 ** (attempt - 1)
+                print(f"⚠️ Upload of {name} failed (attempt {attempt}/{retries}): {error}; retrying in {delay:.0f}s")
+                time.sleep(delay)
+    except (OSError, ValueError) as e:
+        error = f"could not read {name}: {e}"
+    finally:
+        if owned:
+            fileobj.close()
+
+    result = UploadResult(name, size, time.perf_counter() - start, attempt, error)
+    if manifest is not None and not error:
+        manifest.record(name, checksum, result.bytes)
+    if error:
+        print(f"❌ Failed to upload {name}: {error}")
+    else:
+        print(f"✅ Uploaded {name} ({result.bytes / 1024:.1f} KB, {result.seconds:.1f}s)")
+    return result
+
+
+def upload_many(session, base_url, files, workers=UPLOAD_WORKERS, use_manifest=True):
+    """
+    files: {remote name: path, bytes or binary file}. Uploads concurrently,
+    skipping files the folder's manifest already has; results in input order.
+    """
+    start = time.perf_counter()
+    manifest = UploadManifest(session, base_url).load() if use_manifest else None
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as pool:
+        futures = [pool.submit(upload, session, base_url + name, source, name, manifest=manifest)
+                   for name, source in files.items()]
+        results = [future.result() for future in futures]
+    if manifest is not None:
+        failed = manifest.save()
+        if failed:
+            results.append(failed)
+    print_upload_report(results, time.perf_counter() - start)
+    return results
+
+
+def print_upload_report(results, total):
+    sent = sum(result.bytes for result in results if not result.error and not result.skipped)
+    skipped = [result for result in results if result.skipped]
+    failed = [result for result in results if result.error]
+    print(f"📤 {len(results) - len(failed) - len(skipped)}/{len(results)} files, {sent / 1024:.1f} KB in {total:.1f}s"
+          + (f" ({len(skipped)} unchanged, {sum(r.bytes for r in skipped) / 1024:.1f} KB not sent)" if skipped else ""))
+    for result in results:
+        if result.skipped:
+            print(f"  ⏭️ {result.name}: unchanged")
+            continue
+        status = "✅" if not result.error else "❌"
+        retries = f", {result.attempts} attempts" if result.attempts > 1 else ""
+        print(f"  {status} {result.name}: {result.bytes / 1024:.1f} KB in {result.seconds:.2f}s{retries}")